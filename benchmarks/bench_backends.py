@@ -0,0 +1,97 @@
+"""
+Compare summarizer inference backends on CPU.
+
+Each backend runs in its own subprocess so the peak RSS reported is that of
+a worker holding only that backend.
+
+    python benchmarks/bench_backends.py --backends torch int8 onnx --runs 5
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+FLASK_API = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flask_api")
+
+SAMPLE = (
+    "The old lighthouse keeper had watched the coast for forty years. "
+    "Every night he climbed the spiral stairs, trimmed the wick and polished the lens. "
+    "Ships passed safely because of his care, though few sailors knew his name. "
+) * 20
+
+
+def run_child(backend, runs, batch_size):
+    sys.path.insert(0, FLASK_API)
+    from config import Config
+    from backends import load_backend
+    from summarizer import MODEL_NAME
+    import torch
+
+    start = time.perf_counter()
+    tokenizer, model, device = load_backend(backend, MODEL_NAME, onnx_cache_dir=Config.ONNX_CACHE_DIR)
+    load_seconds = time.perf_counter() - start
+
+    inputs = tokenizer(
+        ["summarize: " + SAMPLE] * batch_size,
+        max_length=512, truncation=True, padding=True, return_tensors="pt"
+    ).to(device)
+
+    def generate():
+        with torch.no_grad():
+            return model.generate(**inputs, max_length=150, min_length=20, num_beams=1, do_sample=False)
+
+    generate()  # warmup
+
+    latencies = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        generate()
+        latencies.append(time.perf_counter() - t)
+
+    return {
+        "backend": backend,
+        "batch_size": batch_size,
+        "load_seconds": round(load_seconds, 3),
+        "latency_mean_s": round(statistics.mean(latencies), 4),
+        "latency_min_s": round(min(latencies), 4),
+        "per_summary_s": round(statistics.mean(latencies) / batch_size, 4),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.child, args.runs, args.batch_size)))
+        return
+
+    results = []
+    for backend in args.backends:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--child", backend,
+             "--runs", str(args.runs), "--batch-size", str(args.batch_size)],
+            capture_output=True, text=True
+        )
+        if proc.returncode != 0:
+            print(f"❌ {backend}: {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'}")
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    print(f"{'backend':<8} {'load s':>8} {'mean s':>8} {'min s':>8} {'per summary s':>14} {'peak RSS MB':>12}")
+    for r in results:
+        print(f"{r['backend']:<8} {r['load_seconds']:>8} {r['latency_mean_s']:>8} {r['latency_min_s']:>8} "
+              f"{r['per_summary_s']:>14} {r['peak_rss_mb']:>12}")
+
+
+if __name__ == "__main__":
+    main()
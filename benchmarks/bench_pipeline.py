@@ -0,0 +1,360 @@
+"""
+Benchmark the summarization pipeline across input sizes, offline on CPU.
+
+Synthetic text (1 KB - 50 MB) and hand-written PDFs (1 - 1,000 pages) are
+generated on the fly (PDFs into a temp directory). Every stage reports p50/p95 latency, throughput and
+peak Python memory; the pdf stage measures extraction, with the page
+cache moved into the temp directory and emptied before every run; summarize_text also reports its internal stage split
+(clean, extract, tokenize, generate, decode) from the /metrics histograms.
+
+    python benchmarks/bench_pipeline.py --stub --out before.json
+    python benchmarks/bench_pipeline.py --stub --out after.json
+    python benchmarks/bench_pipeline.py --compare before.json after.json
+
+--stub replaces the tokenizer and model with whitespace stand-ins so the
+pipeline around the model can be measured without model weights.
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import zlib
+
+FLASK_API = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "flask_api")
+
+TEXT_SIZES = ["1KB", "10KB", "100KB", "1MB", "10MB", "50MB"]
+PDF_PAGES = [1, 10, 100, 1000]
+STAGES = ["extract", "pack", "summarize_text", "summarize_book", "pdf"]
+
+WORDS = (
+    "the of and to in a is that for it as was with be by on not he this are or his from at "
+    "which but have an they you were her she there been one all we their has would when if "
+    "river market winter lantern harbor garden letter captain village mountain journey "
+    "silence promise kingdom stranger history morning evening thunder library machine "
+    "remembered discovered whispered travelled carried believed wondered gathered followed "
+    "quietly suddenly carefully slowly bright ancient narrow golden heavy distant"
+).split()
+
+
+# ---------------------------------------------------------------------------
+# Synthetic inputs
+# ---------------------------------------------------------------------------
+
+def parse_size(size):
+    units = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+    size = size.strip().upper()
+    for unit, factor in units.items():
+        if size.endswith(unit):
+            return int(float(size[:-len(unit)]) * factor)
+    return int(size)
+
+
+def synthetic_text(n_bytes, seed=0):
+    """Deterministic prose-like ASCII text of about n_bytes characters."""
+    rng = random.Random(seed)
+    paragraphs, size = [], 0
+    while size < n_bytes:
+        sentences = []
+        for _ in range(rng.randint(3, 8)):
+            words = rng.choices(WORDS, k=rng.randint(6, 28))
+            sentences.append(" ".join(words).capitalize() + rng.choice(".....!?"))
+        paragraph = " ".join(sentences)
+        paragraphs.append(paragraph)
+        size += len(paragraph) + 2
+    return "\n\n".join(paragraphs)[:n_bytes]
+
+
+def synthetic_pdf(pages, seed=0, lines_per_page=40):
+    """
+    A minimal valid PDF (one Helvetica text stream per page) written by
+    hand, so no PDF library is needed to build it.
+    """
+    rng = random.Random(seed)
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+
+    for _ in range(pages):
+        lines = []
+        for _ in range(lines_per_page):
+            words = rng.choices(WORDS, k=rng.randint(8, 14))
+            lines.append((" ".join(words).capitalize() + ".").encode("ascii"))
+        ops = [b"BT /F1 10 Tf 12 TL 50 760 Td"]
+        ops += [b"(" + line + b") Tj T*" for line in lines]
+        ops.append(b"ET")
+        stream = zlib.compress(b"\n".join(ops))
+
+        content_id = len(objects) + 1
+        objects.append(b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_id = len(objects) + 1
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(b"%d 0 R" % page_id)
+
+    objects[1] = b"<< /Type /Pages /Kids [" + b" ".join(kids) + b"] /Count %d >>" % pages
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+# ---------------------------------------------------------------------------
+# Stub model
+# ---------------------------------------------------------------------------
+
+class StubTokenizer:
+    """Whitespace tokenizer with the parts of the T5 tokenizer API the pipeline uses."""
+    pad_token_id = 0
+    eos_token_id = 1
+
+    def _encode(self, text):
+        return [2 + (zlib.crc32(w.encode()) % 32000) for w in text.split()]
+
+    def __call__(self, texts, add_special_tokens=True, **kwargs):
+        eos = [self.eos_token_id] if add_special_tokens else []
+        if isinstance(texts, str):
+            return {"input_ids": self._encode(texts) + eos}
+        return {"input_ids": [self._encode(t) + eos for t in texts]}
+
+
+def stub_run_batch(texts, max_length=150, min_length=30, max_words=None, cancels=None):
+    # Echo the first words back, as if the model had summarized instantly
+    words = max_words or max_length
+    return [
+        " ".join(t.split()[:words]) if isinstance(t, str) else " ".join(["word"] * min(words, len(t)))
+        for t in texts
+    ]
+
+
+def load_pipeline(stub):
+    sys.path.insert(0, FLASK_API)
+    import logging
+    logging.disable(logging.INFO)
+
+    # PDF workers honour PDF_WORKERS, forked before the model threads start
+    import pdf_extract
+    pdf_extract.init_pdf_pool()
+
+    import summarizer
+    if stub:
+        summarizer._tokenizer = StubTokenizer()
+        summarizer.batcher.configure(stub_run_batch, max_in_flight=1)
+    else:
+        summarizer.warmup()
+        if not summarizer.is_ready():
+            raise SystemExit(f"Model failed to load: {summarizer.model_status['error']}")
+    return summarizer
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def percentile(values, q):
+    """Nearest-rank percentile."""
+    values = sorted(values)
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def measure(fn, runs, warmup=1, setup=None):
+    """setup, if given, runs untimed before every call of fn."""
+    setup = setup or (lambda: None)
+    for _ in range(warmup):
+        setup()
+        fn()
+
+    latencies = []
+    for _ in range(runs):
+        setup()
+        t = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t)
+
+    # Separate run for memory: tracemalloc slows allocation-heavy code down
+    setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return latencies, peak
+
+
+def reset_page_cache(directory):
+    """
+    Point pdf_extract at an empty page cache in directory, so the next run
+    parses every page and nothing is written to the real PAGE_CACHE_DIR.
+    """
+    import pdf_extract
+    from config import Config
+    from page_cache import PageTextCache
+
+    shutil.rmtree(directory, ignore_errors=True)
+    pdf_extract.page_cache = PageTextCache(directory, Config.PAGE_CACHE_MAX_BYTES)
+
+
+def stage_split(before, after):
+    """Seconds spent in each internal pipeline stage between two histogram snapshots."""
+    split = {}
+    for key, (total, count) in after.items():
+        prev_total, prev_count = before.get(key, (0.0, 0))
+        if count > prev_count:
+            split[key[0]] = round(total - prev_total, 6)
+    return split
+
+
+def bench_stage(summarizer, stage, label, payload, units, runs, page_cache_dir=None):
+    import metrics
+    import pdf_extract
+    from extractive import extract_key_sentences
+
+    fns = {
+        "extract": lambda: extract_key_sentences(payload, num_sentences=15),
+        "pack": lambda: summarizer.pack_input_ids(payload),
+        "summarize_text": lambda: summarizer.summarize_text(payload),
+        "summarize_book": lambda: summarizer.summarize_book(payload),
+        "pdf": lambda: pdf_extract.extract_text(payload),
+    }
+
+    setup = None
+    if stage == "pdf":
+        setup = lambda: reset_page_cache(page_cache_dir)
+
+    before = metrics.stage_seconds.totals()
+    latencies, peak = measure(fns[stage], runs, setup=setup)
+    after = metrics.stage_seconds.totals()
+
+    p50 = percentile(latencies, 50)
+    result = {
+        "stage": stage,
+        "input": label,
+        "input_units": units,
+        "runs": runs,
+        "p50_s": round(p50, 6),
+        "p95_s": round(percentile(latencies, 95), 6),
+        "throughput": round(units[1] / p50, 2) if p50 > 0 else None,
+        "throughput_unit": f"{units[0]}/s",
+        "peak_mb": round(peak / 1024 ** 2, 2),
+    }
+    if stage in ("summarize_text", "summarize_book"):
+        # Includes the warmup and memory runs: runs + 2 calls in total
+        result["stage_split_s"] = {
+            k: round(v / (runs + 2), 6) for k, v in stage_split(before, after).items()
+        }
+    return result
+
+
+def run(args):
+    summarizer = load_pipeline(args.stub)
+    results = []
+    tmp = tempfile.TemporaryDirectory()
+
+    for stage in args.stages:
+        if stage == "pdf":
+            inputs = []
+            for n in args.pages:
+                path = os.path.join(tmp.name, f"{n}.pdf")
+                with open(path, "wb") as f:
+                    f.write(synthetic_pdf(n))
+                inputs.append((f"{n} pages", path, ("pages", n)))
+        else:
+            inputs = []
+            for size in args.sizes:
+                n = parse_size(size)
+                if stage == "summarize_book" and n > parse_size(args.book_max):
+                    continue
+                inputs.append((size, synthetic_text(n), ("MB", n / 1024 ** 2)))
+
+        for label, payload, units in inputs:
+            runs = args.runs if units[1] < 10 or stage == "pdf" else max(1, args.runs // 2)
+            result = bench_stage(summarizer, stage, label, payload, units, runs,
+                                 page_cache_dir=os.path.join(tmp.name, "page_cache"))
+            results.append(result)
+            print(f"{stage:<15} {label:>10}  p50 {result['p50_s']:>9.4f}s  p95 {result['p95_s']:>9.4f}s  "
+                  f"{result['throughput']:>10} {result['throughput_unit']:<8} peak {result['peak_mb']:>8} MB",
+                  file=sys.stderr)
+
+    tmp.cleanup()
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "stub": args.stub,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        },
+        "results": results
+    }
+
+
+def compare(baseline_path, current_path, threshold):
+    """Print p50/p95 ratios per stage and input; True if anything regressed."""
+    with open(baseline_path) as f:
+        baseline = {(r["stage"], r["input"]): r for r in json.load(f)["results"]}
+    with open(current_path) as f:
+        current = json.load(f)["results"]
+
+    regressed = False
+    print(f"{'stage':<15} {'input':>10} {'p50 before':>11} {'p50 after':>10} {'ratio':>7} "
+          f"{'p95 ratio':>9} {'peak MB':>15}")
+    for r in current:
+        b = baseline.get((r["stage"], r["input"]))
+        if b is None:
+            continue
+        ratio = r["p50_s"] / b["p50_s"] if b["p50_s"] else float("inf")
+        ratio95 = r["p95_s"] / b["p95_s"] if b["p95_s"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"{r['stage']:<15} {r['input']:>10} {b['p50_s']:>11.4f} {r['p50_s']:>10.4f} {ratio:>7.2f} "
+              f"{ratio95:>9.2f} {b['peak_mb']:>7} -> {r['peak_mb']:<6}{flag}")
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stages", nargs="+", default=STAGES, choices=STAGES)
+    parser.add_argument("--sizes", nargs="+", default=TEXT_SIZES, help="text sizes, e.g. 1KB 10MB")
+    parser.add_argument("--pages", nargs="+", type=int, default=PDF_PAGES, help="PDF page counts")
+    parser.add_argument("--book-max", default="1MB", help="largest input for summarize_book")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--stub", action="store_true", help="stub tokenizer/model, no weights needed")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"))
+    parser.add_argument("--threshold", type=float, default=0.10, help="p50 slowdown flagged as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    report = run(args)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -39,3 +39,40 @@ CREATE TABLE logs (
     action VARCHAR(200) NOT NULL,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
+
+CREATE TABLE summary_cache (
+    key VARCHAR(64) PRIMARY KEY,
+    model_name VARCHAR(100) NOT NULL,
+    summary_text TEXT NOT NULL,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE summary_jobs (
+    id SERIAL PRIMARY KEY,
+    user_id INTEGER REFERENCES users(id),
+    book_id INTEGER REFERENCES books(id) ON DELETE CASCADE,
+    source_text TEXT,
+    source_path VARCHAR(500),
+    mode VARCHAR(20) DEFAULT 'fast',
+    length_setting VARCHAR(20) DEFAULT 'medium',
+    bypass_cache BOOLEAN DEFAULT FALSE,
+    status VARCHAR(20) DEFAULT 'queued',
+    progress INTEGER DEFAULT 0,
+    summary_text TEXT,
+    summary_id INTEGER REFERENCES summaries(id) ON DELETE SET NULL,
+    error TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
+-- Indexes, trigram search and later changes are versioned migrations,
+-- applied with: cd flask_api && python migrations.py
+CREATE TABLE schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(200) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
\ No newline at end of file
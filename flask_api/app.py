@@ -1,5 +1,6 @@
 print("app.py file is executing")
 
+import logging
 from flask import Flask
 from flask_cors import CORS
 from config import Config
@@ -7,6 +8,17 @@ from db import db
 from routes.auth import auth_bp
 from routes.books import books_bp
 from routes.summary import summary_bp
+from routes.health import health_bp
+from summarizer import start_warmup
+from worker_pool import init_model_pool
+from pdf_extract import init_pdf_pool
+from jobs import init_jobs
+from migrations import log_pending
+
+logging.basicConfig(
+    level=Config.LOG_LEVEL,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
 
 app = Flask(__name__)
 CORS(app)
@@ -16,11 +28,25 @@ db.init_app(app)
 
 with app.app_context():
     db.create_all()
+    # Indexes and later schema changes are applied with migrations.py
+    log_pending(db.engine)
 
 # Register routes
 app.register_blueprint(auth_bp, url_prefix="/api/auth")
 app.register_blueprint(books_bp, url_prefix="/api/books")
 app.register_blueprint(summary_bp, url_prefix="/api/summary")
+app.register_blueprint(health_bp)
+
+# PDF extraction processes are forked before any background thread starts
+init_pdf_pool()
+
+# Model runs in worker processes, or is loaded + warmed here in the
+# background; auth/book routes serve meanwhile
+if init_model_pool() is None:
+    start_warmup()
+
+# Local workers for queued summary jobs
+init_jobs(app)
 
 if __name__ == "__main__":
     print("Flask API is starting...")
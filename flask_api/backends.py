@@ -0,0 +1,86 @@
+"""
+CPU/GPU inference backends for the T5 summarizer.
+
+Every backend returns (tokenizer, model, device) where model exposes the
+Hugging Face generate() API, so summarizer.py does not care which one runs.
+
+    torch  - eager PyTorch (fp16 on CUDA, fp32 on CPU)
+    int8   - PyTorch with Linear layers dynamically quantized to int8 (CPU)
+    onnx   - ONNX Runtime encoder/decoder export with cached past key values
+"""
+import os
+
+
+def _load_tokenizer(model_name):
+    from transformers import T5TokenizerFast
+    return T5TokenizerFast.from_pretrained(model_name)
+
+
+def load_torch(model_name):
+    import torch
+    from transformers import T5ForConditionalGeneration
+
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+
+    model = T5ForConditionalGeneration.from_pretrained(model_name).to(device)
+    model.eval()
+
+    if device.type == 'cuda':
+        model = model.half()
+
+    return _load_tokenizer(model_name), model, device
+
+
+def load_int8(model_name):
+    import torch
+    from transformers import T5ForConditionalGeneration
+
+    device = torch.device("cpu")
+
+    model = T5ForConditionalGeneration.from_pretrained(model_name)
+    model.eval()
+    model = torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+    return _load_tokenizer(model_name), model, device
+
+
+def load_onnx(model_name, cache_dir=None):
+    import torch
+
+    try:
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+    except ImportError:
+        raise RuntimeError(
+            "The onnx backend needs `pip install optimum[onnxruntime]`"
+        )
+
+    device = torch.device("cpu")
+
+    # Export once, then reuse the exported encoder/decoder graphs
+    export_dir = os.path.join(cache_dir, model_name.replace("/", "_")) if cache_dir else None
+    if export_dir and os.path.isdir(export_dir):
+        model = ORTModelForSeq2SeqLM.from_pretrained(export_dir, use_cache=True)
+    else:
+        model = ORTModelForSeq2SeqLM.from_pretrained(model_name, export=True, use_cache=True)
+        if export_dir:
+            model.save_pretrained(export_dir)
+
+    return _load_tokenizer(model_name), model, device
+
+
+BACKENDS = {
+    "torch": load_torch,
+    "int8": load_int8,
+    "onnx": load_onnx,
+}
+
+
+def load_backend(name, model_name, **kwargs):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{name}' (choose from {', '.join(BACKENDS)})")
+
+    if name == "onnx":
+        return load_onnx(model_name, cache_dir=kwargs.get("onnx_cache_dir"))
+    return BACKENDS[name](model_name)
@@ -0,0 +1,197 @@
+import math
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cancellation import GenerationCancelled
+from metrics import stage_seconds, batch_size
+
+
+class _Request:
+    def __init__(self, text, max_length, min_length, max_words, cancel, lengths=None):
+        self.text = text
+        self.params = (max_length, min_length, max_words)
+        self.lengths = lengths
+        self.cancel = cancel
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceBatcher:
+    """
+    Dynamic micro-batching for model.generate.
+
+    Requests arriving within max_wait_ms of the first one are collected
+    (up to max_batch_size), padded into one batch and run with a single
+    generate call by one scheduler thread. Each caller blocks until its
+    own result is ready.
+
+    max_in_flight batches may run at once (one per model worker process);
+    the next batch is only collected once a slot is free, so batches grow
+    while every worker is busy.
+
+    submit_lengths queues one input for several lengths; it takes a slot
+    like a batch and is run on its own by run_lengths (one encoder pass,
+    one decoder run per length).
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=30, max_in_flight=1, run_lengths=None):
+        self.run_batch = run_batch
+        self.run_lengths = run_lengths
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_in_flight = max_in_flight
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self.batch_seconds = None    # moving average of one batch's run time
+
+    def configure(self, run_batch, max_in_flight, run_lengths=None):
+        """Route batches elsewhere (e.g. a worker pool); call before first use."""
+        self.run_batch = run_batch
+        self.max_in_flight = max_in_flight
+        if run_lengths is not None:
+            self.run_lengths = run_lengths
+
+    def submit(self, text, max_length=150, min_length=30, max_words=None, cancel=None):
+        return self.submit_many([text], max_length, min_length, max_words, cancel)[0]
+
+    def submit_many(self, texts, max_length=150, min_length=30, max_words=None, cancel=None):
+        """
+        Summaries for texts, in order. A fired cancel token drops requests
+        still queued and stops rows mid-generation (GenerationCancelled).
+        """
+        requests = [_Request(t, max_length, min_length, max_words, cancel) for t in texts]
+        return self._wait(requests, cancel)
+
+    def submit_lengths(self, text, lengths, cancel=None):
+        """
+        One summary of text per (max_length, min_length, max_words) in
+        lengths, in order, sharing one encoder pass.
+        """
+        return self._wait([_Request(text, None, None, None, cancel, lengths=lengths)], cancel)[0]
+
+    def _wait(self, requests, cancel):
+        self._ensure_started()
+        for r in requests:
+            self._queue.put(r)
+
+        results = []
+        for r in requests:
+            # Don't wait for the rest of a batch once our own token fires
+            while not r.done.wait(0.05 if cancel is not None else None):
+                if cancel.cancelled:
+                    raise GenerationCancelled(cancel.reason)
+            if r.error is not None:
+                raise r.error
+            results.append(r.result)
+        return results
+
+    def pending(self):
+        """Number of requests waiting for a batch slot."""
+        return self._queue.qsize()
+
+    def estimate_wait(self, default_batch_seconds=1.0):
+        """
+        Rough seconds until a request submitted now has its result: the
+        batches queued ahead of it (spread over max_in_flight slots), plus
+        one more round if every slot is busy, plus its own batch.
+        """
+        per_batch = self.batch_seconds or default_batch_seconds
+        batches_ahead = math.ceil(self.pending() / self.max_batch_size)
+        rounds = math.ceil(batches_ahead / self.max_in_flight)
+        if self._in_flight >= self.max_in_flight:
+            rounds += 1
+        return (rounds + 1) * per_batch
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._slots = threading.Semaphore(self.max_in_flight)
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_in_flight, thread_name_prefix="inference-batch"
+                )
+                self._thread = threading.Thread(
+                    target=self._loop, name="inference-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            self._slots.acquire()
+            batch = self._collect()
+            self._executor.submit(self._run, batch)
+
+    def _run(self, batch):
+        with self._lock:
+            self._in_flight += 1
+        start = time.monotonic()
+        groups = {}
+        try:
+            # Requests with different generation settings can't share a call
+            for r in batch:
+                if r.cancel is not None and r.cancel.cancelled:
+                    # Nobody is waiting for this one any more: skip the work
+                    r.error = GenerationCancelled(r.cancel.reason)
+                    r.done.set()
+                    continue
+                groups.setdefault(r.params if r.lengths is None else id(r), []).append(r)
+
+            for group in groups.values():
+                if group[0].lengths is not None:
+                    r = group[0]
+                    self._run_group(group, lambda: [self.run_lengths(r.text, r.lengths, cancel=r.cancel)])
+                    continue
+
+                max_length, min_length, max_words = group[0].params
+                self._run_group(group, lambda: self.run_batch(
+                    [r.text for r in group],
+                    max_length=max_length,
+                    min_length=min_length,
+                    max_words=max_words,
+                    cancels=[r.cancel for r in group]
+                ))
+        finally:
+            with self._lock:
+                if groups:
+                    elapsed = time.monotonic() - start
+                    self.batch_seconds = elapsed if self.batch_seconds is None else (
+                        0.8 * self.batch_seconds + 0.2 * elapsed
+                    )
+                self._in_flight -= 1
+            self._slots.release()
+
+    def _run_group(self, group, run):
+        batch_size.observe(len(group))
+        try:
+            with stage_seconds.time(stage="batch"):
+                outputs = run()
+            for r, out in zip(group, outputs):
+                # Fired during generate: the row stopped early, its output is partial
+                if r.cancel is not None and r.cancel.is_set():
+                    r.error = GenerationCancelled(r.cancel.reason)
+                else:
+                    r.result = out
+        except Exception as e:
+            for r in group:
+                r.error = e
+        finally:
+            for r in group:
+                r.done.set()
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import logging
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+from config import Config
+from db import db
+from models import SummaryCache
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(text, model_name, **params):
+    """
+    Hash of the normalized text, model name and generation parameters.
+    The inference backend and the sentence ranking method that packs the
+    model input change the summary too, so they are always part of it.
+    """
+    params = dict(params, backend=Config.INFERENCE_BACKEND, extractive_method=Config.EXTRACTIVE_METHOD)
+    normalized = re.sub(r'\s+', ' ', text).strip()
+    h = hashlib.sha256()
+    h.update(normalized.encode("utf-8"))
+    h.update(model_name.encode("utf-8"))
+    h.update(json.dumps(params, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+class LRUCache:
+    """
+    Bounded in-process LRU, evicting by total size of the cached summaries.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._data.get(key)
+            if value is not None:
+                self._data.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        nbytes = len(value.encode("utf-8"))
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.size -= len(old.encode("utf-8"))
+
+            self._data[key] = value
+            self.size += nbytes
+
+            while self.size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self.size -= len(evicted.encode("utf-8"))
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SummaryCacheStore:
+    """
+    Two-tier summary cache: in-memory LRU in front of the summary_cache table.
+    """
+
+    def __init__(self, max_bytes, max_rows):
+        self.memory = LRUCache(max_bytes)
+        self.max_rows = max_rows
+        self.stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+    def get(self, key):
+        summary = self.memory.get(key)
+        if summary is not None:
+            self._count("memory_hits")
+            return summary
+
+        try:
+            row = db.session.get(SummaryCache, key)
+            if row is not None:
+                row.last_used_at = datetime.utcnow()
+                row.hit_count = (row.hit_count or 0) + 1
+                db.session.commit()
+                self.memory.put(key, row.summary_text)
+                self._count("db_hits")
+                return row.summary_text
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Cache read error: %s", e)
+
+        self._count("misses")
+        return None
+
+    def put(self, key, model_name, summary):
+        self.memory.put(key, summary)
+
+        try:
+            row = db.session.get(SummaryCache, key)
+            if row is None:
+                row = SummaryCache(key=key, model_name=model_name)
+                db.session.add(row)
+            row.summary_text = summary
+            row.last_used_at = datetime.utcnow()
+            db.session.flush()
+
+            # Size-based eviction: keep the most recently used max_rows rows
+            count = db.session.query(db.func.count(SummaryCache.key)).scalar()
+            if count > self.max_rows:
+                stale = (
+                    db.session.query(SummaryCache.key)
+                    .order_by(SummaryCache.last_used_at.asc())
+                    .limit(count - self.max_rows)
+                    .subquery()
+                )
+                evicted = (
+                    SummaryCache.query
+                    .filter(SummaryCache.key.in_(db.select(stale.c.key)))
+                    .delete(synchronize_session=False)
+                )
+                self._count("evictions", evicted)
+
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error("Cache write error: %s", e)
+
+    def get_or_compute(self, text, model_name, compute, bypass=False, **params):
+        """
+        Return (summary, hit). bypass skips the lookup but still refreshes
+        the cached value with the newly computed summary.
+        """
+        key = cache_key(text, model_name, **params)
+
+        if not bypass:
+            summary = self.get(key)
+            if summary is not None:
+                return summary, True
+
+        summary = compute()
+        self.put(key, model_name, summary)
+        return summary, False
+
+    def info(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats["memory_entries"] = len(self.memory)
+        stats["memory_bytes"] = self.memory.size
+        return stats
+
+
+summary_cache = SummaryCacheStore(
+    max_bytes=Config.SUMMARY_CACHE_MAX_BYTES,
+    max_rows=Config.SUMMARY_CACHE_MAX_ROWS
+)
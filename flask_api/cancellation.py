@@ -0,0 +1,48 @@
+import threading
+import time
+
+
+class GenerationCancelled(Exception):
+    """Raised instead of returning a summary whose request was cancelled."""
+
+
+class CancelToken:
+    """
+    Cancellation flag for one summary request. It fires when cancel() is
+    called (client disconnect, DELETE of a job) or once the deadline
+    passes. Generation checks it between decode steps through a
+    StoppingCriteria.
+    """
+
+    def __init__(self, timeout=None):
+        self.deadline = time.monotonic() + timeout if timeout is not None else None
+        self.reason = None
+        self._event = threading.Event()
+
+    def cancel(self, reason="cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    def is_set(self):
+        """Whether the token has fired, without looking at the deadline."""
+        return self._event.is_set()
+
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("deadline exceeded")
+            return True
+        return False
+
+    def remaining(self):
+        """Seconds until the deadline, or None without one."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def check(self):
+        if self.cancelled:
+            raise GenerationCancelled(self.reason)
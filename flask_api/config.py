@@ -1,3 +1,6 @@
+import os
+
+
 class Config:
     SQLALCHEMY_DATABASE_URI = (
         "postgresql+psycopg2://Rohini:npg_JcO2svwTMoG5"
@@ -14,3 +17,71 @@ class Config:
     }
 
     SECRET_KEY = "my12345"
+
+    LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+
+    # Single-pass summarization: ranked sentences are packed into this window
+    SUMMARY_INPUT_TOKENS = 512
+    SUMMARY_PDF_PAGES = 40          # pages sampled across an uploaded PDF
+
+    # Generation for a request is cancelled after this long (the Streamlit
+    # client gives up at 180s); 0 disables the deadline
+    SUMMARY_REQUEST_TIMEOUT = int(os.environ.get("SUMMARY_REQUEST_TIMEOUT", 170))
+
+    # Mode routing: fall back to extractive summaries under load
+    ROUTER_OVERLOAD_QUEUE = int(os.environ.get("ROUTER_OVERLOAD_QUEUE", 32))  # queued requests
+    ROUTER_DEFAULT_BATCH_SECONDS = 2.0  # batch time assumed before one has been measured
+
+    # Full-book (map-reduce) summarization
+    SUMMARY_BATCH_SIZE = 8          # chunks submitted to the batcher at once
+    SUMMARY_CHUNK_TOKENS = 480      # leaves room for the "summarize: " prefix
+    SUMMARY_STAGE_BUDGET = 60       # seconds allowed per map/reduce stage
+    SUMMARY_MAX_STAGES = 4
+
+    # A failed model load/warmup is retried after this many seconds,
+    # doubling up to the max
+    MODEL_WARMUP_RETRY_SECONDS = 5
+    MODEL_WARMUP_RETRY_MAX_SECONDS = 300
+
+    # Micro-batching of concurrent generate calls
+    INFERENCE_BATCH_SIZE = 8        # max requests per model.generate call
+    INFERENCE_BATCH_WAIT_MS = 30    # how long to wait for more requests
+
+    # Summary cache (in-memory LRU + summary_cache table)
+    SUMMARY_CACHE_MAX_BYTES = 16 * 1024 * 1024
+    SUMMARY_CACHE_MAX_ROWS = 10000
+
+    # Inference backend: "torch" (eager), "int8" (dynamic quantization, CPU)
+    # or "onnx" (ONNX Runtime, needs optimum[onnxruntime])
+    INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch")
+    ONNX_CACHE_DIR = os.path.join(os.path.dirname(__file__), "onnx_models")
+
+    # Key-sentence scoring: "frequency", "tfidf" or "textrank"
+    EXTRACTIVE_METHOD = os.environ.get("EXTRACTIVE_METHOD", "frequency")
+
+    # Async summarization jobs (summary_jobs table)
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+    JOB_POLL_SECONDS = 2
+    JOB_STALE_SECONDS = 15 * 60     # running jobs without a heartbeat get re-queued
+    JOB_TIMEOUT_SECONDS = 60 * 60   # a job still generating after this is cancelled
+    # PDFs of queued jobs wait here until a worker extracts them (local disk:
+    # a job re-queued on another host after a crash fails)
+    JOB_UPLOAD_DIR = os.environ.get("JOB_UPLOAD_DIR", os.path.join(os.path.dirname(__file__), "job_uploads"))
+
+    # Model worker processes (0 = run the model inside the web process).
+    # Each process holds its own model and MODEL_WORKER_THREADS torch threads
+    # (default: cores / processes).
+    MODEL_WORKER_PROCESSES = int(os.environ.get("MODEL_WORKER_PROCESSES", 0))
+    MODEL_WORKER_THREADS = int(os.environ.get("MODEL_WORKER_THREADS", 0))
+
+    # PDF text extraction processes (0 = extract in-process; always so without
+    # fork). Opt-in: each web process forks this many copies of itself, so
+    # keep workers x PDF_WORKERS within the cores
+    PDF_WORKERS = int(os.environ.get("PDF_WORKERS", 0))
+    PDF_PAGES_PER_TASK = 16         # page range handed to one worker at a time
+    PDF_PARALLEL_MIN_PAGES = 8      # smaller files are not worth the round trip
+    PDF_PAGE_TIMEOUT = 10           # seconds before a page is skipped
+
+    # Extracted PDF page text on local disk, keyed by file hash (LRU by size)
+    PAGE_CACHE_DIR = os.environ.get("PAGE_CACHE_DIR", os.path.join(os.path.dirname(__file__), "page_cache"))
+    PAGE_CACHE_MAX_BYTES = int(os.environ.get("PAGE_CACHE_MAX_BYTES", 256 * 1024 * 1024))
@@ -0,0 +1,260 @@
+import numpy as np
+import scipy.sparse as sp
+from numpy.lib.stride_tricks import as_strided
+
+METHODS = ("frequency", "tfidf", "textrank")
+
+MIN_SENTENCE_CHARS = 20
+MIN_WORD_CHARS = 3
+
+# Character classes (bit flags) for the ASCII range; index 128 stands for
+# any non-ASCII character and is refined in _char_classes
+SPACE, TERMINATOR, LETTER, WORD = 1, 2, 4, 8
+
+_ASCII_CLASS = np.zeros(129, dtype=np.uint8)
+_ASCII_CLASS[[9, 10, 11, 12, 13, 28, 29, 30, 31, 32]] = SPACE
+_ASCII_CLASS[[ord('.'), ord('!'), ord('?')]] = TERMINATOR
+_ASCII_CLASS[ord('a'):ord('z') + 1] = LETTER | WORD
+_ASCII_CLASS[ord('A'):ord('Z') + 1] = LETTER | WORD
+_ASCII_CLASS[ord('0'):ord('9') + 1] = WORD
+_ASCII_CLASS[ord('_')] = WORD
+_ASCII_CLASS[128] = WORD
+
+_UNICODE_SPACE = np.array(
+    [0x85, 0xA0, 0x1680] + list(range(0x2000, 0x200B)) + [0x2028, 0x2029, 0x202F, 0x205F, 0x3000],
+    dtype=np.uint32
+)
+
+# _BYTE_MASK[r] keeps the first r bytes of a little-endian uint64
+_BYTE_MASK = np.array([(1 << (8 * r)) - 1 for r in range(9)], dtype=np.uint64)
+_LOWERCASE_BITS = np.uint64(0x2020202020202020)
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def _codepoints(text):
+    """One code point per character, index-aligned with the str."""
+    if text.isascii():
+        return np.frombuffer(text.encode('ascii'), dtype=np.uint8)
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+
+def _char_classes(cp):
+    if cp.dtype == np.uint8:
+        return _ASCII_CLASS[cp]
+
+    cls = _ASCII_CLASS[np.minimum(cp, 128)]
+    wide = np.flatnonzero(cp >= 128)
+    if wide.size:
+        c = cp[wide]
+        # Approximate \w / \s for non-ASCII: Unicode spaces, Latin-1 symbols
+        # and general/CJK punctuation are not word characters
+        punctuation = (
+            ((c >= 0xA0) & (c <= 0xBF))
+            | ((c >= 0x2000) & (c <= 0x206F))
+            | ((c >= 0x3000) & (c <= 0x303F))
+            | (c == 0xD7) | (c == 0xF7)
+        )
+        cls[wide] = np.where(np.isin(c, _UNICODE_SPACE), SPACE, np.where(punctuation, 0, WORD))
+    return cls
+
+
+def sentence_spans(text, cls=None, min_chars=MIN_SENTENCE_CHARS):
+    """
+    (starts, ends) of sentences longer than min_chars, splitting after
+    . ! ? followed by whitespace (same rule as the old regex split).
+    """
+    if cls is None:
+        cls = _char_classes(_codepoints(text))
+    n = cls.size
+
+    space = (cls & SPACE) != 0
+    non_space = np.flatnonzero(~space)
+    if non_space.size == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # A sentence ends after a terminator followed by whitespace; the next one
+    # starts at the first non-space character after that whitespace run
+    ends = np.flatnonzero(((cls[:-1] & TERMINATOR) != 0) & space[1:]) + 1
+    next_pos = np.searchsorted(non_space, ends)
+    next_starts = np.where(
+        next_pos < non_space.size,
+        non_space[np.minimum(next_pos, non_space.size - 1)],
+        n
+    )
+
+    starts = np.concatenate(([non_space[0]], next_starts))
+    ends = np.concatenate((ends, [non_space[-1] + 1]))
+
+    keep = (ends - starts) > min_chars
+    return starts[keep], ends[keep]
+
+
+def _term_keys(cp, run_starts, lengths):
+    """
+    uint64 key per word, read straight from the text bytes 8 letters at a
+    time (lowercased by setting bit 0x20). Words of up to 8 letters get
+    their exact bytes as key; longer words fold further blocks in with a
+    multiplicative hash.
+    """
+    text8 = cp if cp.dtype == np.uint8 else np.where(cp < 128, cp, 0).astype(np.uint8)
+    padded = np.concatenate((text8, np.zeros(8, dtype=np.uint8)))
+    windows = as_strided(padded, shape=(padded.size - 7, 8), strides=(1, 1))
+
+    keys = np.zeros(run_starts.size, dtype=np.uint64)
+    idx = np.arange(run_starts.size)
+    block = 0
+    while idx.size:
+        chunk = windows[run_starts[idx] + 8 * block].view('<u8').ravel()
+        remaining = np.minimum(lengths[idx] - 8 * block, 8)
+        chunk = (chunk & _BYTE_MASK[remaining]) | (_LOWERCASE_BITS & _BYTE_MASK[remaining])
+        keys[idx] = chunk if block == 0 else (keys[idx] * _MIX) ^ chunk
+
+        block += 1
+        idx = idx[lengths[idx] > 8 * block]
+    return keys
+
+
+def sentence_term_matrix(text, starts, ends, cp=None, cls=None):
+    """
+    Sparse (sentences x terms) count matrix for words matching
+    \\b[a-z]{3,}\\b in the lowercased text.
+
+    Works on the code point array: words are runs of letters bounded by
+    non-word characters, keyed by their letter bytes and numbered with
+    np.unique, so no Python object is created per word.
+    """
+    if cp is None:
+        cp = _codepoints(text)
+    if cls is None:
+        cls = _char_classes(cp)
+    n = cls.size
+
+    # Runs of letters: [run_starts, run_ends)
+    letter = np.concatenate(([False], (cls & LETTER) != 0, [False]))
+    edges = np.flatnonzero(letter[1:] != letter[:-1])
+    run_starts, run_ends = edges[::2], edges[1::2]
+
+    # A run is a term if it is long enough and not part of a longer \w run
+    bounded_left = (run_starts == 0) | ((cls[np.maximum(run_starts - 1, 0)] & WORD) == 0)
+    bounded_right = (run_ends == n) | ((cls[np.minimum(run_ends, n - 1)] & WORD) == 0)
+    lengths = run_ends - run_starts
+    is_term = (lengths >= MIN_WORD_CHARS) & bounded_left & bounded_right
+    run_starts, lengths = run_starts[is_term], lengths[is_term]
+
+    # Sentence of each word; words outside kept sentences are dropped
+    sentence = np.searchsorted(starts, run_starts, side='right') - 1
+    inside = (sentence >= 0) & (run_starts < ends[np.maximum(sentence, 0)])
+    run_starts, lengths, sentence = run_starts[inside], lengths[inside], sentence[inside]
+
+    if run_starts.size == 0:
+        return sp.csr_matrix((starts.size, 0), dtype=np.float64)
+
+    _, terms = np.unique(_term_keys(cp, run_starts, lengths), return_inverse=True)
+
+    X = sp.csr_matrix(
+        (np.ones(terms.size, dtype=np.float64), (sentence, terms.ravel())),
+        shape=(starts.size, int(terms.max()) + 1)
+    )
+    X.sum_duplicates()
+    return X
+
+
+def _l2_normalize_rows(X):
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sp.diags(1.0 / norms) @ X
+
+
+def _idf(X):
+    df = np.bincount(X.indices, minlength=X.shape[1])
+    return np.log(X.shape[0] / np.maximum(df, 1)) + 1.0
+
+
+def score_frequency(X):
+    """Average book-wide frequency of a sentence's words (the original score)."""
+    freq = np.asarray(X.sum(axis=0)).ravel()
+    n_words = np.asarray(X.sum(axis=1)).ravel()
+    return (X @ freq) / (n_words + 1)
+
+
+def score_tfidf(X):
+    """Words frequent in the book but concentrated in few sentences score high."""
+    weights = np.asarray(X.sum(axis=0)).ravel() * _idf(X)
+    present = X.copy()
+    present.data[:] = 1.0
+    n_terms = np.diff(X.indptr)
+    return (present @ weights) / (n_terms + 1)
+
+
+def score_textrank(X, damping=0.85, max_iter=50, tol=1e-6):
+    """
+    PageRank over the sentence cosine-similarity graph.
+
+    With Xn the row-normalized TF-IDF matrix the graph is Xn @ Xn.T minus
+    self-loops; it is applied in factored form so the n x n matrix is never
+    built and each iteration stays O(nnz).
+    """
+    n = X.shape[0]
+    Xn = _l2_normalize_rows(X.multiply(_idf(X)).tocsr()).tocsr()
+    XnT = Xn.T.tocsr()
+
+    self_sim = (np.diff(Xn.indptr) > 0).astype(np.float64)
+
+    def similarity_dot(v):
+        return Xn @ (XnT @ v) - self_sim * v
+
+    degree = similarity_dot(np.ones(n))
+    has_edges = degree > 1e-12
+    inv_degree = np.where(has_edges, 1.0 / np.where(has_edges, degree, 1.0), 0.0)
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        # Rank held by sentences without edges is spread uniformly
+        dangling = rank[~has_edges].sum()
+        new_rank = (1 - damping) / n + damping * (similarity_dot(rank * inv_degree) + dangling / n)
+        converged = np.abs(new_rank - rank).sum() < tol
+        rank = new_rank
+        if converged:
+            break
+    return rank
+
+
+SCORERS = {
+    "frequency": score_frequency,
+    "tfidf": score_tfidf,
+    "textrank": score_textrank,
+}
+
+
+def rank_sentences(text, starts, ends, method="frequency", cp=None, cls=None):
+    """One score per sentence span."""
+    if method not in SCORERS:
+        raise ValueError(f"Unknown extraction method '{method}' (choose from {', '.join(METHODS)})")
+    return SCORERS[method](sentence_term_matrix(text, starts, ends, cp, cls))
+
+
+def top_sentence_indices(scores, num_sentences):
+    """
+    Indices of the highest scoring sentences, in original order. Ties go
+    to the later sentence, as sorting (score, index) pairs in reverse did.
+    """
+    if num_sentences >= len(scores):
+        return np.arange(len(scores))
+    order = np.argsort(scores, kind='stable')[::-1][:num_sentences]
+    return np.sort(order)
+
+
+def extract_key_sentences(text, num_sentences=12, method="frequency"):
+    """
+    INSTANT extractive summarization - finds key sentences in < 1 second.
+    """
+    cp = _codepoints(text)
+    cls = _char_classes(cp)
+    starts, ends = sentence_spans(text, cls)
+
+    if starts.size > num_sentences:
+        scores = rank_sentences(text, starts, ends, method, cp, cls)
+        keep = top_sentence_indices(scores, num_sentences)
+        starts, ends = starts[keep], ends[keep]
+
+    return ' '.join(text[s:e] for s, e in zip(starts.tolist(), ends.tolist()))
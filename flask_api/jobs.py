@@ -0,0 +1,199 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+
+from cancellation import CancelToken, GenerationCancelled
+from config import Config
+from db import db
+from models import Book, SummaryJob
+from pdf_extract import iter_pages
+
+logger = logging.getLogger(__name__)
+
+# Share of a PDF job's progress spent extracting pages
+EXTRACT_PROGRESS = 0.2
+
+
+def remove_upload(job):
+    """Delete the uploaded PDF of a job, if it has one."""
+    if job.source_path:
+        try:
+            os.remove(job.source_path)
+        except OSError:
+            pass
+
+
+class JobRunner:
+    """
+    Pool of local worker threads running queued summary_jobs rows.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    processes can share the table. Running jobs refresh updated_at as a
+    heartbeat; one whose heartbeat is older than JOB_STALE_SECONDS (its
+    process died) is picked up again.
+
+    A job cancelled through cancel() (or set to "cancelled" by another
+    process, noticed at the next progress heartbeat) stops generating.
+    """
+
+    def __init__(self, workers, poll_seconds, stale_seconds, timeout_seconds=None):
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.stale_seconds = stale_seconds
+        self.timeout_seconds = timeout_seconds
+        self.app = None
+        self._wake = threading.Event()
+        self._threads = []
+        self._tokens = {}
+
+    def start(self, app):
+        self.app = app
+        for i in range(self.workers):
+            t = threading.Thread(target=self._loop, name=f"summary-job-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def notify(self):
+        """Wake an idle worker right away instead of at the next poll."""
+        self._wake.set()
+
+    def cancel(self, job_id):
+        """Stop a job running in this process; its row is updated by the caller."""
+        token = self._tokens.get(job_id)
+        if token is not None:
+            token.cancel("job cancelled")
+
+    def _loop(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    job_id = self._claim()
+                    if job_id is not None:
+                        self._run(job_id)
+                        continue
+            except Exception as e:
+                logger.error("Job worker error: %s", e)
+
+            self._wake.wait(self.poll_seconds)
+            self._wake.clear()
+
+    def _claim(self):
+        stale_before = datetime.utcnow() - timedelta(seconds=self.stale_seconds)
+
+        job = (
+            SummaryJob.query
+            .filter(db.or_(
+                SummaryJob.status == "queued",
+                db.and_(SummaryJob.status == "running", SummaryJob.updated_at < stale_before)
+            ))
+            .order_by(SummaryJob.created_at.asc(), SummaryJob.id.asc())
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            db.session.rollback()
+            return None
+
+        now = datetime.utcnow()
+        job.status = "running"
+        job.progress = 0
+        job.started_at = now
+        job.updated_at = now
+        db.session.commit()
+        return job.id
+
+    def _set_progress(self, job_id, fraction):
+        updated = SummaryJob.query.filter_by(id=job_id, status="running").update({
+            "progress": max(0, min(99, int(fraction * 100))),
+            "updated_at": datetime.utcnow()
+        })
+        db.session.commit()
+        if not updated:
+            # Cancelled from elsewhere (e.g. DELETE served by another process)
+            self.cancel(job_id)
+
+    def _extract(self, job, token):
+        """Text of a job's uploaded PDF, reporting pages read as progress."""
+        max_pages = None if job.mode == "full" else Config.SUMMARY_PDF_PAGES
+        stats, texts, reported = {}, [], 0
+        for text in iter_pages(job.source_path, max_pages, stats):
+            token.check()
+            texts.append(text)
+            read = (stats["pages_processed"] + stats["pages_skipped"]) / max(stats["pages_total"], 1)
+            if read - reported >= 0.05:
+                self._set_progress(job.id, EXTRACT_PROGRESS * read)
+                reported = read
+
+        if not texts:
+            raise ValueError("No text could be extracted from the PDF")
+        return "\n".join(texts)
+
+    def _run(self, job_id):
+        # Imported here: routes.summary imports this module for job_runner
+        from routes.summary import run_summarizer, save_book_summary, log_direct_summary
+
+        job = db.session.get(SummaryJob, job_id)
+        token = self._tokens[job_id] = CancelToken(timeout=self.timeout_seconds)
+        try:
+            book = db.session.get(Book, job.book_id, options=[db.undefer(Book.content)]) if job.book_id else None
+            text = book.content if book else job.source_text
+            start = 0
+            if job.source_path:
+                text = self._extract(job, token)
+                start = EXTRACT_PROGRESS
+
+            summary_text, _ = run_summarizer(
+                text,
+                job.mode,
+                job.bypass_cache,
+                progress=lambda f: self._set_progress(job_id, start + (1 - start) * f),
+                length_setting=job.length_setting,
+                cancel=token
+            )
+
+            db.session.refresh(job)
+            if job.status == "cancelled":
+                raise GenerationCancelled("job cancelled")
+
+            if book:
+                job.summary_id = save_book_summary(book, summary_text, job.length_setting).id
+            else:
+                log_direct_summary(job.user_id)
+
+            job.summary_text = summary_text
+            job.status = "done"
+            job.progress = 100
+
+        except GenerationCancelled as e:
+            db.session.rollback()
+            job = db.session.get(SummaryJob, job_id)
+            job.status = "cancelled"
+            job.error = str(e)
+
+        except Exception as e:
+            db.session.rollback()
+            job = db.session.get(SummaryJob, job_id)
+            job.status = "failed"
+            job.error = str(e)
+
+        finally:
+            self._tokens.pop(job_id, None)
+            remove_upload(job)
+
+        job.finished_at = datetime.utcnow()
+        job.updated_at = job.finished_at
+        db.session.commit()
+
+
+job_runner = JobRunner(
+    workers=Config.JOB_WORKERS,
+    poll_seconds=Config.JOB_POLL_SECONDS,
+    stale_seconds=Config.JOB_STALE_SECONDS,
+    timeout_seconds=Config.JOB_TIMEOUT_SECONDS
+)
+
+
+def init_jobs(app):
+    if Config.JOB_WORKERS > 0:
+        job_runner.start(app)
@@ -0,0 +1,185 @@
+"""
+In-process metrics rendered in the Prometheus text exposition format.
+
+No client library or push gateway: counters and histograms live in this
+process and GET /metrics renders them for a scraper.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+_registry = []
+_lock = threading.Lock()
+
+
+def _label_str(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in pairs
+    ) + "}"
+
+
+def _fmt(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        _registry.append(self)
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with _lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_str(self.labelnames, key)} {_fmt(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.labelnames = tuple(labelnames)
+        self._values = {}     # labels -> [bucket counts, sum, count]
+        _registry.append(self)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def totals(self):
+        """{label values: (sum, count)} for every series."""
+        with _lock:
+            return {key: (total, count) for key, (_, total, count) in self._values.items()}
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with _lock:
+            for key, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    labels = _label_str(self.labelnames, key, ("le", _fmt(bound)))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _label_str(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_fmt(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Gauge:
+    """
+    Value read at scrape time from a callback returning a number, or a
+    dict of {label value: number} for a single label.
+    """
+
+    def __init__(self, name, help, read, labelname=None, type="gauge"):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.labelname = labelname
+        self.type = type
+        _registry.append(self)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        try:
+            value = self.read()
+        except Exception:
+            return lines
+        if isinstance(value, dict):
+            for label, v in sorted(value.items()):
+                lines.append(f"{self.name}{_label_str((self.labelname,), (label,))} {_fmt(v)}")
+        else:
+            lines.append(f"{self.name} {_fmt(value)}")
+        return lines
+
+
+def render():
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Summarization pipeline metrics
+# ---------------------------------------------------------------------------
+
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+stage_seconds = Histogram(
+    "summarizer_stage_seconds",
+    "Time per pipeline stage: clean, extract, tokenize, encode, generate, decode, pdf, and batch (a whole micro-batch, in-process or in a model worker).",
+    STAGE_BUCKETS,
+    labelnames=("stage",)
+)
+
+summary_seconds = Histogram(
+    "summarizer_request_seconds",
+    "End-to-end summarization latency, cache lookups included.",
+    STAGE_BUCKETS + (120, 300, 600),
+    labelnames=("mode", "cached")
+)
+
+input_chars = Histogram(
+    "summarizer_input_chars",
+    "Size of the text handed to the summarizer.",
+    (1e3, 1e4, 1e5, 1e6, 1e7, 5e7)
+)
+
+input_tokens = Histogram(
+    "summarizer_input_tokens",
+    "Tokens per model input after packing or chunking.",
+    (32, 64, 128, 256, 384, 480, 512)
+)
+
+batch_size = Histogram(
+    "inference_batch_size",
+    "Inputs per model.generate call.",
+    (1, 2, 4, 8, 16, 32)
+)
+
+summaries_total = Counter(
+    "summarizer_summaries_total",
+    "Summaries served, by mode and whether they came from the cache.",
+    labelnames=("mode", "cached")
+)
+
+pdf_pages = Counter(
+    "pdf_pages_total",
+    "PDF pages read, by outcome.",
+    labelnames=("outcome",)
+)
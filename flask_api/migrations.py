@@ -0,0 +1,175 @@
+"""
+Versioned schema migrations on top of db.create_all().
+
+create_all() only creates missing tables; everything after that (indexes,
+extensions, column changes) is a numbered migration below. Applied
+versions are recorded in schema_migrations. Migrations are applied by
+hand, as a deploy step run from one place; the API only logs the pending
+ones at startup, since an index build on a large table can take minutes:
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --list     # show applied / pending
+
+On PostgreSQL every statement runs in autocommit and CREATE INDEX runs
+as CREATE INDEX CONCURRENTLY, so writes to the table go on during the
+build. A migration interrupted halfway is run again from its first
+statement, so statements must be idempotent (IF NOT EXISTS).
+
+Append new migrations with the next version number; never edit or
+reorder one that has shipped.
+"""
+import argparse
+import logging
+import re
+from contextlib import contextmanager
+
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+# (version, name, statements, dialect or None for every database)
+MIGRATIONS = [
+    (1, "hot path indexes", [
+        # Per-user listings and history, newest first (keyset on created_at, id)
+        "CREATE INDEX IF NOT EXISTS ix_books_user_created ON books (user_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_logs_user_created ON logs (user_id, created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_summaries_book_created ON summaries (book_id, created_at, id)",
+        # Admin views over all rows
+        "CREATE INDEX IF NOT EXISTS ix_books_created ON books (created_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_logs_created ON logs (created_at, id)",
+        # Logs of a book, removed with it
+        "CREATE INDEX IF NOT EXISTS ix_logs_book ON logs (book_id)",
+    ], None),
+    (2, "trigram indexes for title/author/tag search", [
+        # ilike '%term%' cannot use a btree; pg_trgm GIN indexes can
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX IF NOT EXISTS ix_books_title_trgm ON books USING gin (title gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_books_author_trgm ON books USING gin (author gin_trgm_ops)",
+        "CREATE INDEX IF NOT EXISTS ix_books_tags_trgm ON books USING gin (tags gin_trgm_ops)",
+    ], "postgresql"),
+    (3, "uploaded PDF of a summary job", [
+        # New SQLite databases get the column from create_all()
+        "ALTER TABLE summary_jobs ADD COLUMN IF NOT EXISTS source_path VARCHAR(500)",
+    ], "postgresql"),
+]
+
+_CREATE_INDEX = re.compile(r"CREATE INDEX (IF NOT EXISTS )?(\w+)")
+
+
+def _ensure_table(conn):
+    conn.execute(sa.text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INTEGER PRIMARY KEY,"
+        " name VARCHAR(200) NOT NULL,"
+        " applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+
+
+def applied_versions(conn):
+    _ensure_table(conn)
+    return {row[0] for row in conn.execute(sa.text("SELECT version FROM schema_migrations"))}
+
+
+def pending_migrations(engine):
+    """(version, name) of the migrations not applied yet; changes nothing."""
+    with engine.connect() as conn:
+        done = set()
+        if sa.inspect(conn).has_table("schema_migrations"):
+            done = {row[0] for row in conn.execute(sa.text("SELECT version FROM schema_migrations"))}
+    return [(version, name) for version, name, _, _ in MIGRATIONS if version not in done]
+
+
+def log_pending(engine):
+    """Warn about pending migrations at startup; never fails the caller."""
+    try:
+        pending = pending_migrations(engine)
+    except Exception as e:
+        logger.warning("Could not check schema migrations: %s", e)
+        return
+    if pending:
+        logger.warning(
+            "%d schema migration(s) pending (%s); apply them with: python migrations.py",
+            len(pending), ", ".join(f"{version}: {name}" for version, name in pending)
+        )
+
+
+@contextmanager
+def _connect(engine):
+    """PostgreSQL: an autocommit connection (CONCURRENTLY can't run in a transaction); else one transaction."""
+    if engine.dialect.name == "postgresql":
+        with engine.connect() as conn:
+            yield conn.execution_options(isolation_level="AUTOCOMMIT")
+    else:
+        with engine.begin() as conn:
+            yield conn
+
+
+def _execute(conn, statement):
+    match = _CREATE_INDEX.match(statement)
+    if conn.dialect.name != "postgresql" or match is None:
+        conn.execute(sa.text(statement))
+        return
+
+    # A concurrent build that failed leaves an invalid index behind, which
+    # IF NOT EXISTS would then skip: drop it and build again
+    name = match.group(2)
+    invalid = conn.execute(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid"
+        " WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name}).first()
+    if invalid is not None:
+        logger.info("Dropping invalid index %s left by an earlier build", name)
+        conn.execute(sa.text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(sa.text("CREATE INDEX CONCURRENTLY " + statement[len("CREATE INDEX "):]))
+
+
+def migrate(engine):
+    """
+    Apply pending migrations in order. Returns the versions applied.
+    Migrations for another dialect are recorded without running.
+    """
+    applied = []
+    dialect = engine.dialect.name
+
+    for version, name, statements, only in MIGRATIONS:
+        with _connect(engine) as conn:
+            if version in applied_versions(conn):
+                continue
+
+            if only is None or only == dialect:
+                for statement in statements:
+                    _execute(conn, statement)
+                logger.info("Applied migration %d: %s", version, name)
+            else:
+                logger.info("Migration %d (%s) is %s only; recorded without running", version, name, only)
+            conn.execute(
+                sa.text("INSERT INTO schema_migrations (version, name) VALUES (:version, :name)"
+                        " ON CONFLICT (version) DO NOTHING"),
+                {"version": version, "name": name}
+            )
+        applied.append(version)
+
+    return applied
+
+
+if __name__ == "__main__":
+    from config import Config
+
+    parser = argparse.ArgumentParser(description="Apply schema migrations")
+    parser.add_argument("--list", action="store_true", help="show applied and pending migrations")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=Config.LOG_LEVEL, format="%(levelname)s %(name)s: %(message)s")
+    engine = sa.create_engine(Config.SQLALCHEMY_DATABASE_URI, **Config.SQLALCHEMY_ENGINE_OPTIONS)
+
+    if args.list:
+        with engine.begin() as conn:
+            done = applied_versions(conn)
+        for version, name, _, only in MIGRATIONS:
+            state = "applied" if version in done else "pending"
+            print(f"{version:>4}  {state:<8} {name}" + (f" ({only} only)" if only else ""))
+    else:
+        # Same starting point as the app: tables first, then migrations
+        from models import db
+        db.metadata.create_all(engine)
+        print("Applied:", migrate(engine) or "nothing, schema is up to date")
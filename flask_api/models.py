@@ -32,7 +32,9 @@ class Book(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     author = db.Column(db.String(200))
-    content = db.Column(db.Text, nullable=False)  # raw_text renamed to content to match SQL
+    # raw_text renamed to content to match SQL. Deferred: loaded only where
+    # the text is used (detail, summarize), never by listings
+    content = db.deferred(db.Column(db.Text, nullable=False))
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
@@ -51,7 +53,7 @@ class Summary(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     book_id = db.Column(db.Integer, db.ForeignKey("books.id"), nullable=False)
     summary_text = db.Column(db.Text)
-    summary_type = db.Column(db.String(20), default="auto")  # auto, manual, custom
+    summary_type = db.Column(db.String(20), default="auto")  # auto, extractive, manual, custom
     length_setting = db.Column(db.String(20), default="medium")  # short, medium, long
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
@@ -64,3 +66,39 @@ class Log(db.Model):
     book_id = db.Column(db.Integer, db.ForeignKey("books.id"), nullable=True)
     action = db.Column(db.String(200), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class SummaryCache(db.Model):
+    __tablename__ = "summary_cache"
+
+    key = db.Column(db.String(64), primary_key=True)  # sha256 of text + model + params
+    model_name = db.Column(db.String(100), nullable=False)
+    summary_text = db.Column(db.Text, nullable=False)
+    hit_count = db.Column(db.Integer, default=0)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_used_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+class SummaryJob(db.Model):
+    __tablename__ = "summary_jobs"
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    book_id = db.Column(db.Integer, db.ForeignKey("books.id", ondelete="CASCADE"), nullable=True)
+    source_text = db.Column(db.Text)  # direct text/file jobs; book jobs read books.content
+    source_path = db.Column(db.String(500))  # uploaded PDF, extracted by the job
+
+    mode = db.Column(db.String(20), default="fast")  # fast, full
+    length_setting = db.Column(db.String(20), default="medium")
+    bypass_cache = db.Column(db.Boolean, default=False)
+
+    status = db.Column(db.String(20), default="queued")  # queued, running, done, failed
+    progress = db.Column(db.Integer, default=0)  # percent
+    summary_text = db.Column(db.Text)
+    summary_id = db.Column(db.Integer, db.ForeignKey("summaries.id", ondelete="SET NULL"), nullable=True)
+    error = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)  # worker heartbeat
+    finished_at = db.Column(db.DateTime)
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import logging
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from collections import OrderedDict
+
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# What a missing, read-only or full cache directory, or a damaged cache
+# file, can raise; callers treat these as a miss or a skipped write
+CACHE_ERRORS = (OSError, zlib.error, ValueError)
+
+_MAGIC = b"PGC1"
+_HEADER = struct.Struct("!4sI")   # magic, index length
+
+
+def file_digest(path):
+    """sha256 of a file, read in 1 MB blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class PageTextCache:
+    """
+    Extracted page text on local disk, keyed by the sha256 of the PDF.
+
+    One file per PDF: a JSON index (page count, chapter starts, and the
+    offset and length of each cached page) followed by the zlib-compressed
+    page texts, so a few pages can be read without inflating the rest.
+    Pages that had no text are cached with length 0. Files are evicted
+    least recently used first once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._files = None   # digest -> bytes, least recently used first
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest[:2], digest + ".pages")
+
+    def _scan(self):
+        """Index the files already on disk, oldest access first (under _lock)."""
+        if self._files is not None:
+            return
+
+        found = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".pages"):
+                    try:
+                        st = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    found.append((st.st_atime, name[:-len(".pages")], st.st_size))
+
+        self._files = OrderedDict((digest, size) for _, digest, size in sorted(found))
+        self.size = sum(self._files.values())
+
+    def _read(self, digest):
+        """(index, file) for a cached PDF, or (None, None)."""
+        try:
+            f = open(self._path(digest), "rb")
+        except OSError:
+            return None, None
+        try:
+            magic, length = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != _MAGIC:
+                raise ValueError("bad magic")
+            return json.loads(f.read(length)), f
+        except Exception as e:
+            f.close()
+            logger.warning("Dropping unreadable page cache file %s: %s", digest, e)
+            self._remove(digest)
+            return None, None
+
+    def _remove(self, digest):
+        with self._lock:
+            self._scan()
+            self.size -= self._files.pop(digest, 0)
+        try:
+            os.remove(self._path(digest))
+        except OSError:
+            pass
+
+    def meta(self, digest):
+        """pages_total and chapters of a cached PDF, or None when not cached."""
+        index, f = self._read(digest)
+        if index is None:
+            with self._lock:
+                self.stats["misses"] += 1
+            return None
+        f.close()
+
+        with self._lock:
+            self.stats["hits"] += 1
+            self._scan()
+            if digest in self._files:
+                self._files.move_to_end(digest)
+        try:
+            os.utime(self._path(digest))
+        except OSError:
+            pass
+        return index["meta"]
+
+    def pages(self, digest, indices):
+        """
+        Page index -> text ("" for pages without text) for those of indices
+        that are cached.
+        """
+        index, f = self._read(digest)
+        if index is None:
+            return {}
+
+        wanted = set(indices)
+        pages = {}
+        with f:
+            try:
+                base = f.tell()
+                for key, (offset, length) in index["pages"].items():
+                    page = int(key)
+                    if page not in wanted:
+                        continue
+                    if length == 0:
+                        pages[page] = ""
+                        continue
+                    f.seek(base + offset)
+                    pages[page] = zlib.decompress(f.read(length)).decode("utf-8")
+            except CACHE_ERRORS as e:
+                logger.warning("Dropping unreadable page cache file %s: %s", digest, e)
+                pages = None
+        if pages is None:
+            self._remove(digest)
+            return {}
+        return pages
+
+    def put(self, digest, meta, pages):
+        """
+        Add pages (page index -> text, "" or None for no text) to the cached
+        PDF, keeping the pages it already has.
+        """
+        blobs = {}
+        index, f = self._read(digest)
+        if f is not None:
+            with f:
+                base = f.tell()
+                for key, (offset, length) in index["pages"].items():
+                    f.seek(base + offset)
+                    blobs[int(key)] = f.read(length)
+
+        for page, text in pages.items():
+            blobs[page] = zlib.compress(text.encode("utf-8")) if text else b""
+
+        entries, offset = {}, 0
+        for page in sorted(blobs):
+            entries[str(page)] = (offset, len(blobs[page]))
+            offset += len(blobs[page])
+        header = json.dumps({"meta": meta, "pages": entries}).encode("utf-8")
+
+        path = self._path(digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written aside and renamed, so readers never see half a file
+        with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as tmp:
+            try:
+                tmp.write(_HEADER.pack(_MAGIC, len(header)) + header)
+                for page in sorted(blobs):
+                    tmp.write(blobs[page])
+            except OSError:
+                tmp.close()
+                os.remove(tmp.name)
+                raise
+        os.replace(tmp.name, path)
+        nbytes = os.path.getsize(path)
+
+        evicted = []
+        with self._lock:
+            self._scan()
+            self.size += nbytes - self._files.pop(digest, 0)
+            self._files[digest] = nbytes
+            while self.size > self.max_bytes and len(self._files) > 1:
+                old, size = self._files.popitem(last=False)
+                self.size -= size
+                self.stats["evictions"] += 1
+                evicted.append(old)
+
+        for old in evicted:
+            try:
+                os.remove(self._path(old))
+            except OSError:
+                pass
+
+    def info(self):
+        with self._lock:
+            self._scan()
+            stats = dict(self.stats)
+            stats["files"] = len(self._files)
+            stats["bytes"] = self.size
+        return stats
+
+
+page_cache = PageTextCache(
+    directory=Config.PAGE_CACHE_DIR,
+    max_bytes=Config.PAGE_CACHE_MAX_BYTES
+)
@@ -0,0 +1,76 @@
+"""
+Keyset pagination on (created_at, id), newest first.
+
+A page is requested with ?limit=N and, after the first one, the
+?cursor=... returned as next_cursor by the previous page. The cursor is an
+opaque token for the last row of that page, so every page is an index
+range scan whatever its depth. Rows without a created_at sort before all
+others, as a descending index scan returns them on Postgres.
+"""
+import base64
+import json
+from datetime import datetime
+
+from db import db
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def encode_cursor(created_at, row_id):
+    raw = json.dumps([created_at.isoformat() if created_at else None, row_id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        if created_at is not None:
+            created_at = datetime.fromisoformat(created_at)
+        return created_at, int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def page_args(args):
+    """(limit, cursor) from request args; raises ValueError when malformed."""
+    try:
+        limit = int(args.get("limit", DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    cursor = args.get("cursor")
+    return limit, decode_cursor(cursor) if cursor else None
+
+
+def newest_first(created_col, id_col):
+    """ORDER BY clauses of the pagination order."""
+    return created_col.desc().nulls_first(), id_col.desc()
+
+
+def keyset(query, created_col, id_col, cursor, limit):
+    """
+    Rows after cursor, newest first. One extra row is fetched so that
+    page() can tell whether another page follows.
+    """
+    if cursor is not None:
+        created_at, row_id = cursor
+        if created_at is None:
+            # Past part of the NULL rows: the rest of them, then every dated row
+            query = query.filter(db.or_(
+                db.and_(created_col.is_(None), id_col < row_id),
+                created_col.isnot(None)
+            ))
+        else:
+            query = query.filter(db.tuple_(created_col, id_col) < cursor)
+    return query.order_by(*newest_first(created_col, id_col)).limit(limit + 1)
+
+
+def page(rows, limit, key):
+    """(rows of this page, next_cursor or None); key(row) -> (created_at, id)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(*key(rows[-1]))
@@ -0,0 +1,383 @@
+"""
+PDF ingestion shared by book uploads and file summaries.
+
+An upload is spooled to a temp file (spool_upload) and parsed through a
+read-only mmap, so the PDF is never held in memory as a whole. Pages are
+extracted in page ranges on a pool of PDF_WORKERS processes (PyPDF2 is
+CPU-bound pure Python) and yielded lazily in page order (iter_pages).
+When only a budget of pages may be read, the pages are sampled across
+the whole document, per chapter when the PDF has an outline
+(sample_pages). Page texts are kept in the page cache by file hash, so
+a repeated upload is not parsed again. Each page gets PDF_PAGE_TIMEOUT
+seconds, so one malformed page is skipped instead of stalling the whole
+upload: a worker interrupts it with SIGALRM, the request thread stops
+waiting for the helper thread running it.
+
+With PDF_WORKERS=0 (the default) or without fork (Windows), pages are
+extracted in the request thread's process.
+"""
+import logging
+import mmap
+import multiprocessing
+import os
+import signal
+import tempfile
+import threading
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from config import Config
+from metrics import stage_seconds, pdf_pages
+from page_cache import page_cache, file_digest, CACHE_ERRORS
+
+logger = logging.getLogger(__name__)
+
+pdf_pool = None
+
+# Per-page alarms in the workers need SIGALRM, which Windows does not have
+_ALARM = hasattr(signal, "SIGALRM")
+
+
+def init_pdf_pool():
+    """
+    Start the PDF_WORKERS extraction processes. Called from app.py before
+    any other threads start, so the fork is safe. Returns the pool, or None
+    when pages are extracted in the request thread.
+    """
+    global pdf_pool
+
+    if Config.PDF_WORKERS <= 0:
+        return None
+    if "fork" not in multiprocessing.get_all_start_methods():
+        # Spawned workers would import app.py again
+        logger.info("No fork on this platform; PDF pages are extracted in-process")
+        return None
+
+    pdf_pool = ProcessPoolExecutor(
+        max_workers=Config.PDF_WORKERS,
+        mp_context=multiprocessing.get_context("fork")
+    )
+    # Fork every worker now rather than on the first upload
+    pdf_pool.submit(os.getpid).result()
+    return pdf_pool
+
+
+# ---------------------------------------------------------------------------
+# Worker side
+# ---------------------------------------------------------------------------
+
+class _PageTimeout(BaseException):
+    """BaseException so PyPDF2's own `except Exception` blocks let it through."""
+
+
+def _on_alarm(signum, frame):
+    raise _PageTimeout()
+
+
+def _mmap(path):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            raise ValueError("Empty PDF file")
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _extract_page(page, timeout):
+    """(text, outcome) for one page; timeout only applies on a worker's main thread."""
+    alarm = timeout and _ALARM and signal.getsignal(signal.SIGALRM) is _on_alarm
+    try:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        text = page.extract_text()
+    except _PageTimeout:
+        return None, "timeout"
+    except Exception:
+        return None, "failed"
+    finally:
+        if alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+
+    if not text or not text.strip():
+        return None, "empty"
+    return text, "read"
+
+
+def _extract_batch(path, indices, timeout):
+    """
+    Worker task: (text, outcome) for each page index. The file is opened
+    per task and closed after it, so an idle worker never keeps a deleted
+    upload mapped.
+    """
+    import PyPDF2
+
+    if _ALARM:
+        signal.signal(signal.SIGALRM, _on_alarm)
+
+    mm = _mmap(path)
+    try:
+        reader = PyPDF2.PdfReader(mm)
+        results = []
+        for i in indices:
+            try:
+                results.append(_extract_page(reader.pages[i], timeout))
+            except _PageTimeout:
+                # Alarm landed just as the page finished
+                results.append((None, "timeout"))
+        return results
+    finally:
+        mm.close()
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+def _chapter_starts(reader):
+    """First page of each top-level outline entry, sorted; [] without an outline."""
+    try:
+        outline = reader.outline
+    except Exception:
+        return []
+
+    starts = set()
+    for item in outline:
+        # Nested lists are sub-sections of the entry before them
+        if isinstance(item, list):
+            continue
+        try:
+            starts.add(reader.get_destination_page_number(item))
+        except Exception:
+            continue
+    return sorted(p for p in starts if p is not None and p >= 0)
+
+
+def _spread(start, stop, n):
+    """n page indices spread evenly over start..stop-1, starting at start."""
+    size = stop - start
+    return [start + i * size // n for i in range(n)]
+
+
+def sample_pages(total, chapters, budget):
+    """
+    Sorted indices of at most budget of the total pages, spread across the
+    document. With chapters (first page of each, from the outline), every
+    chapter gets a share proportional to its length (at least its opening
+    page); without them, pages are spread evenly.
+    """
+    if budget is None or total <= budget:
+        return list(range(total))
+
+    starts = list(chapters)
+    if not starts or starts[0] != 0:
+        starts = [0] + starts
+    sections = list(zip(starts, starts[1:] + [total]))
+
+    if len(sections) > budget:
+        # More chapters than pages to read: open a spread of chapters
+        return sorted({sections[i][0] for i in _spread(0, len(sections), budget)})
+
+    # One page per chapter, the rest by chapter length (largest remainders)
+    spare = budget - len(sections)
+    shares = [(stop - start - 1) * spare / (total - len(sections)) for start, stop in sections]
+    counts = [1 + int(share) for share in shares]
+    by_remainder = sorted(range(len(sections)), key=lambda k: shares[k] - int(shares[k]), reverse=True)
+    for k in by_remainder[:budget - sum(counts)]:
+        counts[k] += 1
+
+    pages = []
+    for (start, stop), n in zip(sections, counts):
+        pages.extend(_spread(start, stop, min(n, stop - start)))
+    return pages
+
+
+def _extract_in_thread(page, timeout):
+    """
+    _extract_page on a helper thread; None if it is still running after
+    timeout. A thread can't be interrupted, so a stuck page is left behind
+    (daemon) rather than stalling the request.
+    """
+    result = []
+    thread = threading.Thread(
+        target=lambda: result.append(_extract_page(page, None)), name="pdf-page", daemon=True
+    )
+    thread.start()
+    thread.join(timeout or None)
+    return result[0] if result else None
+
+
+def _iter_inline(path, reader, indices, timeout, abandoned):
+    """
+    (text, outcome) per page, extracted in this process. After a timeout the
+    stuck thread keeps its reader (added to abandoned, so the caller leaves
+    its mmap open) and the next pages are read with a fresh one.
+    """
+    import PyPDF2
+
+    for i in indices:
+        result = _extract_in_thread(reader.pages[i], timeout)
+        if result is None:
+            logger.warning("PDF page %d timed out", i)
+            abandoned.append(reader)
+            reader = PyPDF2.PdfReader(_mmap(path))
+            result = (None, "timeout")
+        yield result
+
+
+def _retire_pool(pool):
+    """
+    Drop a broken pool. It is not forked again: this process runs threads
+    by now, so later uploads are extracted in-process until a restart.
+    """
+    global pdf_pool
+
+    if pdf_pool is pool:
+        pdf_pool = None
+        logger.error("PDF worker pool broke; extracting PDF pages in-process from now on")
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _iter_parallel(pool, path, reader, indices, timeout, abandoned):
+    """(text, outcome) per page in order, keeping a bounded window of batches in flight."""
+    size = max(1, min(Config.PDF_PAGES_PER_TASK, -(-len(indices) // Config.PDF_WORKERS)))
+    batches = iter([indices[i:i + size] for i in range(0, len(indices), size)])
+    in_flight = deque()
+    broken = False
+
+    def submit():
+        batch = next(batches, None) if not broken else None
+        if batch is not None:
+            in_flight.append((batch, pool.submit(_extract_batch, path, batch, timeout)))
+
+    try:
+        for _ in range(2 * Config.PDF_WORKERS):
+            submit()
+
+        while in_flight:
+            batch, future = in_flight.popleft()
+            try:
+                # Per-page alarms normally fire first; this catches a worker
+                # stuck where the alarm cannot interrupt it
+                results = future.result(timeout=len(batch) * timeout + 30 if timeout else None)
+            except FutureTimeout:
+                logger.warning("PDF pages %d-%d timed out", batch[0], batch[-1])
+                results = [(None, "timeout")] * len(batch)
+            except BrokenProcessPool:
+                # A worker died, possibly on one of the batches in flight:
+                # those fail, the pages not handed out yet are read here
+                logger.warning("PDF worker died on pages %d-%d", batch[0], batch[-1])
+                results = [(None, "failed")] * len(batch)
+                if not broken:
+                    broken = True
+                    _retire_pool(pool)
+            submit()
+            yield from results
+
+        if broken:
+            rest = [i for batch in batches for i in batch]
+            yield from _iter_inline(path, reader, rest, timeout, abandoned)
+    finally:
+        # Consumer stopped early
+        for _, future in in_flight:
+            future.cancel()
+
+
+@contextmanager
+def spool_upload(file):
+    """Path of a temp copy of an uploaded file, removed on exit."""
+    with tempfile.NamedTemporaryFile(suffix=".pdf") as f:
+        file.save(f, buffer_size=1024 * 1024)
+        f.flush()
+        yield f.name
+
+
+def keep_upload(file, directory):
+    """Path of a copy of an uploaded file saved in directory; the caller removes it."""
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=".pdf", dir=directory)
+    with os.fdopen(fd, "wb") as f:
+        file.save(f, buffer_size=1024 * 1024)
+    return path
+
+
+def iter_pages(path, max_pages=None, stats=None):
+    """
+    Yield the text of each readable page of the PDF at path, in order.
+    With max_pages, only that many pages chosen by sample_pages are read.
+    Pages already in the page cache for this file are not extracted again.
+    stats, if passed, is filled with pages_total, pages_processed and
+    pages_skipped (empty, failed, timed out or not sampled). Raises when
+    the file is not a readable PDF.
+    """
+    import PyPDF2
+
+    stats = {} if stats is None else stats
+    mm = reader = None
+    abandoned = []
+
+    with stage_seconds.time(stage="pdf"):
+        try:
+            digest = file_digest(path)
+            try:
+                meta = page_cache.meta(digest)
+            except CACHE_ERRORS as e:
+                logger.warning("Page cache unavailable, extracting every page: %s", e)
+                meta = None
+            if meta is None:
+                mm = _mmap(path)
+                reader = PyPDF2.PdfReader(mm)
+                meta = {"pages_total": len(reader.pages), "chapters": _chapter_starts(reader)}
+
+            total = meta["pages_total"]
+            indices = sample_pages(total, meta["chapters"], max_pages)
+            stats.update(pages_total=total, pages_processed=0, pages_skipped=total - len(indices))
+            pdf_pages.inc(total - len(indices), outcome="skipped")
+
+            try:
+                cached = page_cache.pages(digest, indices)
+            except CACHE_ERRORS as e:
+                logger.warning("Page cache unavailable, extracting every page: %s", e)
+                cached = {}
+            missing = [i for i in indices if i not in cached]
+            if missing and reader is None:
+                mm = _mmap(path)
+                reader = PyPDF2.PdfReader(mm)
+
+            timeout = Config.PDF_PAGE_TIMEOUT
+            pool = pdf_pool
+            if pool is not None and len(missing) >= Config.PDF_PARALLEL_MIN_PAGES:
+                extracted = _iter_parallel(pool, path, reader, missing, timeout, abandoned)
+            else:
+                extracted = _iter_inline(path, reader, missing, timeout, abandoned)
+
+            # Failed and timed-out pages are left out, so they are retried
+            fresh = {}
+            for i in indices:
+                if i in cached:
+                    text, outcome = cached[i] or None, "cached"
+                else:
+                    text, outcome = next(extracted)
+                    if outcome in ("read", "empty"):
+                        fresh[i] = text
+
+                pdf_pages.inc(outcome=outcome)
+                if text is None:
+                    stats["pages_skipped"] += 1
+                    continue
+                stats["pages_processed"] += 1
+                yield text
+
+            if fresh or not cached:
+                try:
+                    page_cache.put(digest, meta, fresh)
+                except CACHE_ERRORS as e:
+                    logger.warning("Could not write the page cache: %s", e)
+        finally:
+            # A page left running on a helper thread may still read from it
+            if mm is not None and not abandoned:
+                mm.close()
+
+
+def extract_text(path, max_pages=None, stats=None):
+    """Page texts of the PDF at path joined with newlines; see iter_pages."""
+    return "\n".join(iter_pages(path, max_pages, stats))
@@ -0,0 +1,55 @@
+"""
+Deadline-aware routing between the extractive and abstractive summarizers.
+
+Cached summaries are served by the caller first. For everything else the
+router compares the estimated abstractive latency (queue wait plus the
+batches the text needs) against the request's latency budget, and falls
+back to extractive key sentences when it would not fit, when the queue
+is overloaded or while no model is ready.
+"""
+import math
+
+from config import Config
+from summarizer import batcher, is_ready
+import worker_pool
+
+EXTRACTIVE = "extractive"
+ABSTRACTIVE = "abstractive"
+CACHED = "cached"
+
+
+def model_available():
+    if worker_pool.model_pool is not None:
+        return worker_pool.model_pool.ready_count() > 0
+    return is_ready()
+
+
+def estimate_seconds(text, mode="fast"):
+    """Estimated abstractive latency for text, given the current queue."""
+    wait = batcher.estimate_wait(Config.ROUTER_DEFAULT_BATCH_SECONDS)
+    if mode != "full":
+        return wait
+
+    # Map stage: one short generate per ~chunk, SUMMARY_BATCH_SIZE at a time
+    per_batch = batcher.batch_seconds or Config.ROUTER_DEFAULT_BATCH_SECONDS
+    chunks = len(text) / (Config.SUMMARY_CHUNK_TOKENS * 4)
+    return wait + math.ceil(chunks / Config.SUMMARY_BATCH_SIZE) * per_batch
+
+
+def choose_route(text, mode="fast", budget=None):
+    """
+    (route, reason): EXTRACTIVE or ABSTRACTIVE for one request. budget is
+    the latency the client accepts, in seconds (None: no budget).
+    """
+    if not model_available():
+        return EXTRACTIVE, "model not ready"
+
+    if batcher.pending() >= Config.ROUTER_OVERLOAD_QUEUE:
+        return EXTRACTIVE, "overloaded"
+
+    if budget is not None:
+        estimate = estimate_seconds(text, mode)
+        if estimate > budget:
+            return EXTRACTIVE, f"estimated {estimate * 1000:.0f}ms > budget {budget * 1000:.0f}ms"
+
+    return ABSTRACTIVE, None
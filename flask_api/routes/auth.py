@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
 from werkzeug.security import generate_password_hash, check_password_hash
 from db import db
-from models import User, Log
+from models import User, Book, Summary, Log
+from pagination import page_args, keyset, page
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -87,15 +88,32 @@ def get_users():
         if not admin or admin.role != "admin":
             return jsonify({"error": "Unauthorized access"}), 403
         
-        users = User.query.all()
+        # Per-user counts grouped in subqueries instead of loading u.books
+        book_counts = db.session.query(
+            Book.user_id,
+            db.func.count(Book.id).label("book_count")
+        ).group_by(Book.user_id).subquery()
+        summary_counts = db.session.query(
+            Book.user_id,
+            db.func.count(Summary.id).label("summary_count")
+        ).join(Summary, Summary.book_id == Book.id).group_by(Book.user_id).subquery()
+
+        users = db.session.query(
+            User,
+            db.func.coalesce(book_counts.c.book_count, 0),
+            db.func.coalesce(summary_counts.c.summary_count, 0)
+        ).outerjoin(book_counts, book_counts.c.user_id == User.id)\
+         .outerjoin(summary_counts, summary_counts.c.user_id == User.id).all()
+
         output = [{
             "id": u.id,
             "username": u.username,
             "email": u.email,
             "role": u.role,
             "created_at": u.created_at.isoformat() if u.created_at else None,
-            "book_count": len(u.books)
-        } for u in users]
+            "book_count": book_count,
+            "summary_count": summary_count
+        } for u, book_count, summary_count in users]
         
         return jsonify(output)
     
@@ -125,18 +143,20 @@ def get_user_logs(user_id):
 @auth_bp.route("/history/<int:user_id>", methods=["GET"])
 def upload_history(user_id):
     try:
-        logs = (
-            Log.query
-            .filter_by(user_id=user_id)
-            .order_by(Log.created_at.desc())
-            .all()
-        )
+        limit, cursor = page_args(request.args)
+        logs = keyset(
+            Log.query.filter_by(user_id=user_id), Log.created_at, Log.id, cursor, limit
+        ).all()
+        logs, next_cursor = page(logs, limit, lambda l: (l.created_at, l.id))
 
-        return jsonify([{
+        return jsonify({"items": [{
             "action": l.action,
             "book_id": l.book_id,
-            "created_at": l.created_at.isoformat()
-        } for l in logs])
+            "created_at": l.created_at.isoformat() if l.created_at else None
+        } for l in logs], "next_cursor": next_cursor})
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -149,23 +169,62 @@ def get_all_logs():
     Admin endpoint to fetch all system logs with user information
     """
     try:
-        # Get all logs with user information
-        logs = db.session.query(Log, User).join(User, Log.user_id == User.id)\
-                         .order_by(Log.created_at.desc())\
-                         .limit(500).all()  # Limit to 500 most recent logs
-        
+        limit, cursor = page_args(request.args)
+
+        # Get a page of logs with user information
+        logs = keyset(
+            db.session.query(Log, User.username).join(User, Log.user_id == User.id),
+            Log.created_at, Log.id, cursor, limit
+        ).all()
+        logs, next_cursor = page(logs, limit, lambda row: (row[0].created_at, row[0].id))
+
         output = []
-        for log, user in logs:
+        for log, username in logs:
             output.append({
                 "id": log.id,
                 "action": log.action,
                 "book_id": log.book_id,
                 "user_id": log.user_id,
-                "username": user.username,
+                "username": username,
                 "created_at": log.created_at.isoformat() if log.created_at else None
             })
-        
-        return jsonify(output)
-    
+
+        return jsonify({"items": output, "next_cursor": next_cursor})
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# ================= SYSTEM LOG TOTALS (ADMIN) =================
+@auth_bp.route("/logs/all/stats", methods=["GET"])
+def get_all_logs_stats():
+    """
+    Admin endpoint: counts over all system logs, grouped in SQL
+    """
+    try:
+        def actions(word):
+            return db.func.coalesce(db.func.sum(
+                db.case((db.func.lower(Log.action).like(f"%{word}%"), 1), else_=0)
+            ), 0)
+
+        log_count, user_count, login_count, upload_count, summary_count = db.session.query(
+            db.func.count(Log.id),
+            db.func.count(db.distinct(Log.user_id)),
+            actions("login"),
+            actions("upload"),
+            actions("summary")
+        ).join(User, Log.user_id == User.id).one()
+
+        return jsonify({
+            "log_count": log_count,
+            "user_count": user_count,
+            "login_count": int(login_count),
+            "upload_count": int(upload_count),
+            "summary_count": int(summary_count)
+        })
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
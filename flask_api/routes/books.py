@@ -1,8 +1,8 @@
 from flask import Blueprint, request, jsonify
 from db import db
-from models import Book, Log
-import PyPDF2
-import io
+from models import Book, Summary, Log
+from pdf_extract import extract_text, spool_upload
+from pagination import page_args, keyset, page, newest_first
 from datetime import datetime
 
 books_bp = Blueprint("books", __name__)
@@ -47,19 +47,39 @@ def list_books(user_id):
         search = request.args.get("search", "")
         author_filter = request.args.get("author", "")
         tag_filter = request.args.get("tag", "")
+        limit, cursor = page_args(request.args)
 
-        query = Book.query.filter_by(user_id=user_id)
-
+        books = Book.query.filter(Book.user_id == user_id)
         if search:
-            query = query.filter(Book.title.ilike(f"%{search}%"))
+            books = books.filter(Book.title.ilike(f"%{search}%"))
         if author_filter:
-            query = query.filter(Book.author.ilike(f"%{author_filter}%"))
+            books = books.filter(Book.author.ilike(f"%{author_filter}%"))
         if tag_filter:
-            query = query.filter(Book.tags.ilike(f"%{tag_filter}%"))
+            books = books.filter(Book.tags.ilike(f"%{tag_filter}%"))
+
+        # Ids of this page (keyset on created_at, id)
+        page_ids = db.select(
+            keyset(books.with_entities(Book.id), Book.created_at, Book.id, cursor, limit).subquery().c.id
+        )
 
-        books = query.order_by(Book.created_at.desc()).all()
+        # Newest summary per book and the book's summary count, ranked
+        # in SQL so the page is one round trip
+        latest = db.session.query(
+            Summary.book_id,
+            Summary.summary_text,
+            db.func.row_number().over(
+                partition_by=Summary.book_id,
+                order_by=(Summary.created_at.desc(), Summary.id.desc())
+            ).label("recency"),
+            db.func.count().over(partition_by=Summary.book_id).label("summary_count")
+        ).filter(Summary.book_id.in_(page_ids)).subquery()
+
+        rows = db.session.query(Book, latest.c.summary_text, latest.c.summary_count)\
+                         .outerjoin(latest, db.and_(latest.c.book_id == Book.id, latest.c.recency == 1))\
+                         .filter(Book.id.in_(page_ids))\
+                         .order_by(*newest_first(Book.created_at, Book.id)).all()
+        rows, next_cursor = page(rows, limit, lambda row: (row[0].created_at, row[0].id))
 
-        # ✅ ONLY CHANGE IS HERE
         output = [{
             "id": b.id,
             "title": b.title,
@@ -69,17 +89,69 @@ def list_books(user_id):
             "created_at": b.created_at.isoformat() if b.created_at else None,
 
             # ✅ Summary data for Dashboard Overview
-            "has_summary": len(b.summaries) > 0,
-            "latest_summary": (
-                b.summaries[-1].summary_text if b.summaries else None
-            ),
-            "summary_word_count": (
-                len(b.summaries[-1].summary_text.split())
-                if b.summaries else 0
-            )
-        } for b in books]
-
-        return jsonify(output)
+            "has_summary": bool(summary_count),
+            "summary_count": summary_count or 0,
+            "latest_summary": latest_summary,
+            "summary_word_count": len(latest_summary.split()) if latest_summary else 0
+        } for b, latest_summary, summary_count in rows]
+
+        return jsonify({"items": output, "next_cursor": next_cursor})
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def word_count(column):
+    """
+    SQL word count of a text column. Postgres counts runs of non-space
+    characters like str.split(); elsewhere spaces are counted, which is
+    close enough for the dashboard totals.
+    """
+    if db.engine.dialect.name == "postgresql":
+        return db.func.length(db.func.regexp_replace(column, r"\S+", "x", "g")) \
+            - db.func.length(db.func.regexp_replace(column, r"\S+", "", "g"))
+    text = db.func.trim(column)
+    return db.case(
+        (db.func.coalesce(text, "") == "", 0),
+        else_=db.func.length(text) - db.func.length(db.func.replace(text, " ", "")) + 1
+    )
+
+
+# ───────────────── LIBRARY STATS ─────────────────
+@books_bp.route("/stats/<int:user_id>", methods=["GET"])
+def book_stats(user_id):
+    """
+    Totals of a user's library computed in SQL, so the dashboard does not
+    page through every book to count them.
+    """
+    try:
+        book_count, book_words = db.session.query(
+            db.func.count(Book.id),
+            db.func.coalesce(db.func.sum(word_count(Book.content)), 0)
+        ).filter(Book.user_id == user_id).one()
+
+        # Newest summary per book, as in the book list
+        latest = db.session.query(
+            Summary.summary_text,
+            db.func.row_number().over(
+                partition_by=Summary.book_id,
+                order_by=(Summary.created_at.desc(), Summary.id.desc())
+            ).label("recency")
+        ).join(Book, Book.id == Summary.book_id)\
+         .filter(Book.user_id == user_id).subquery()
+
+        summary_words = db.session.query(
+            db.func.coalesce(db.func.sum(word_count(latest.c.summary_text)), 0)
+        ).filter(latest.c.recency == 1).scalar()
+
+        return jsonify({
+            "book_count": book_count,
+            "word_count": int(book_words),
+            "summary_word_count": int(summary_words)
+        })
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -89,7 +161,7 @@ def list_books(user_id):
 @books_bp.route("/detail/<int:book_id>", methods=["GET"])
 def get_book_detail(book_id):
     try:
-        book = Book.query.get_or_404(book_id)
+        book = Book.query.options(db.undefer(Book.content)).get_or_404(book_id)
 
         return jsonify({
             "id": book.id,
@@ -176,11 +248,9 @@ def upload_pdf():
         if file.filename == "":
             return jsonify({"error": "No file selected"}), 400
 
-        pdf_reader = PyPDF2.PdfReader(io.BytesIO(file.read()))
-        text_content = ""
-
-        for page in pdf_reader.pages:
-            text_content += page.extract_text() + "\n"
+        pages = {}
+        with spool_upload(file) as path:
+            text_content = extract_text(path, stats=pages)
 
         title = request.form.get("title", file.filename)
         author = request.form.get("author", "")
@@ -210,7 +280,7 @@ def upload_pdf():
         db.session.add(log)
         db.session.commit()
 
-        return jsonify({"message": "PDF uploaded successfully", "book_id": book.id})
+        return jsonify({"message": "PDF uploaded successfully", "book_id": book.id, **pages})
 
     except Exception as e:
         db.session.rollback()
@@ -225,13 +295,29 @@ def get_all_books():
     """
     try:
         from models import User
-        
-        # Get all books with user information
-        books = db.session.query(Book, User).join(User, Book.user_id == User.id)\
-                          .order_by(Book.created_at.desc()).all()
-        
+
+        limit, cursor = page_args(request.args)
+        page_ids = db.select(
+            keyset(db.session.query(Book.id), Book.created_at, Book.id, cursor, limit).subquery().c.id
+        )
+
+        # Summary counts of this page's books grouped in one subquery
+        # instead of loading book.summaries per row
+        summary_counts = db.session.query(
+            Summary.book_id,
+            db.func.count(Summary.id).label("summary_count")
+        ).filter(Summary.book_id.in_(page_ids)).group_by(Summary.book_id).subquery()
+
+        # Get a page of books with user information
+        books = db.session.query(Book, User.username, db.func.coalesce(summary_counts.c.summary_count, 0))\
+                          .join(User, Book.user_id == User.id)\
+                          .outerjoin(summary_counts, summary_counts.c.book_id == Book.id)\
+                          .filter(Book.id.in_(page_ids))\
+                          .order_by(*newest_first(Book.created_at, Book.id)).all()
+        books, next_cursor = page(books, limit, lambda row: (row[0].created_at, row[0].id))
+
         output = []
-        for book, user in books:
+        for book, username, summary_count in books:
             output.append({
                 "id": book.id,
                 "title": book.title,
@@ -240,12 +326,40 @@ def get_all_books():
                 "file_type": book.file_type,
                 "created_at": book.created_at.isoformat() if book.created_at else None,
                 "user_id": book.user_id,
-                "username": user.username,
-                "has_summary": len(book.summaries) > 0,
-                "summary_count": len(book.summaries)
+                "username": username,
+                "has_summary": summary_count > 0,
+                "summary_count": summary_count
             })
-        
-        return jsonify(output)
-    
+
+        return jsonify({"items": output, "next_cursor": next_cursor})
+
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+# ───────────────── BOOK TOTALS (ADMIN) ─────────────────
+@books_bp.route("/all/stats", methods=["GET"])
+def get_all_books_stats():
+    """
+    Admin endpoint: book totals over the whole system, counted in SQL
+    """
+    try:
+        summarized = db.session.query(Summary.book_id).distinct().subquery()
+
+        book_count, summarized_count, user_count = db.session.query(
+            db.func.count(Book.id),
+            db.func.count(summarized.c.book_id),
+            db.func.count(db.distinct(Book.user_id))
+        ).outerjoin(summarized, summarized.c.book_id == Book.id).one()
+
+        return jsonify({
+            "book_count": book_count,
+            "summarized_count": summarized_count,
+            "user_count": user_count
+        })
+
     except Exception as e:
         return jsonify({"error": str(e)}), 500
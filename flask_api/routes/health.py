@@ -0,0 +1,77 @@
+from flask import Blueprint, jsonify, Response
+from summarizer import model_status, batcher
+from cache import summary_cache
+from page_cache import page_cache
+from config import Config
+from router import model_available
+import metrics
+import worker_pool
+
+health_bp = Blueprint("health", __name__)
+
+
+def _status():
+    status = {
+        "model": dict(model_status),
+        "queue_depth": batcher.pending(),
+        "estimated_wait_seconds": round(batcher.estimate_wait(Config.ROUTER_DEFAULT_BATCH_SECONDS), 3)
+    }
+    if worker_pool.model_pool is not None:
+        status["worker_pool"] = worker_pool.model_pool.info()
+    return status
+
+
+def _ready():
+    return model_available()
+
+
+# Read at scrape time
+metrics.Gauge("inference_queue_depth", "Requests waiting for a micro-batch slot.", batcher.pending)
+metrics.Gauge("model_ready", "1 once the model (or a model worker) is warm.", lambda: int(_ready()))
+metrics.Gauge(
+    "summary_cache_events_total",
+    "Summary cache lookups and evictions, by outcome.",
+    lambda: {k: v for k, v in summary_cache.info().items() if k in ("memory_hits", "db_hits", "misses", "evictions")},
+    labelname="event",
+    type="counter"
+)
+metrics.Gauge("summary_cache_memory_bytes", "Bytes held by the in-memory summary LRU.",
+              lambda: summary_cache.info()["memory_bytes"])
+metrics.Gauge(
+    "pdf_page_cache_events_total",
+    "PDF page cache lookups and evictions, by outcome.",
+    lambda: {k: v for k, v in page_cache.info().items() if k in ("hits", "misses", "evictions")},
+    labelname="event",
+    type="counter"
+)
+metrics.Gauge("pdf_page_cache_bytes", "Bytes of page text cached on disk.", lambda: page_cache.info()["bytes"])
+
+
+# ================= LIVENESS =================
+@health_bp.route("/healthz", methods=["GET"])
+def healthz():
+    """
+    Process is up and serving; does not wait for the model.
+    """
+    return jsonify({"status": "ok", **_status()})
+
+
+# ================= READINESS =================
+@health_bp.route("/readyz", methods=["GET"])
+def readyz():
+    """
+    200 only once the model is loaded and warmed up, so a load balancer
+    sends summarize traffic to warm workers only.
+    """
+    ready = _ready()
+    body = {"status": "ready" if ready else "not_ready", **_status()}
+    return jsonify(body), (200 if ready else 503)
+
+
+# ================= METRICS =================
+@health_bp.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """
+    Prometheus text format: stage latencies, input sizes, cache and queue.
+    """
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
@@ -1,84 +1,533 @@
-from flask import Blueprint, request, jsonify
+import json
+import os
+import time
+from datetime import datetime
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from db import db
-from models import Book, Summary, Log
-from summarizer import summarize_text
+from models import Book, Summary, Log, SummaryJob
+from summarizer import (
+    summarize_text, summarize_book, stream_summary, summarize_lengths, extractive_summary,
+    length_params, LENGTH_PRESETS, MODEL_NAME
+)
+from cache import summary_cache, cache_key
+from jobs import job_runner, remove_upload
+from pdf_extract import extract_text, spool_upload, keep_upload
+from config import Config
+from cancellation import CancelToken, GenerationCancelled
+from router import choose_route, ABSTRACTIVE, EXTRACTIVE, CACHED
+from metrics import summary_seconds, summaries_total
 
 summary_bp = Blueprint("summary", __name__)
 
+
+def run_summarizer(text, mode, bypass_cache=False, progress=None, length_setting="medium",
+                   cancel=None):
+    """
+    "full" summarizes the whole book (map-reduce), "fast" a single pass.
+    length_setting is a preset (short/medium/long) or "<n> words".
+    Returns (summary, cached); raises GenerationCancelled if cancel fires.
+    """
+    max_length, min_length, max_words = length_params(length_setting)
+
+    def compute():
+        if mode == "full":
+            return summarize_book(text, max_length, min_length, max_words, progress=progress,
+                                  cancel=cancel)
+        return summarize_text(text, max_length, min_length, max_words, cancel=cancel)
+
+    start = time.perf_counter()
+    summary_text, cached = summary_cache.get_or_compute(
+        text, MODEL_NAME, compute, bypass=bypass_cache, mode=mode, max_words=max_words
+    )
+    observe_summary(mode, cached, start)
+    return summary_text, cached
+
+
+def route_summarizer(text, mode, bypass_cache=False, length_setting="medium", budget=None,
+                     cancel=None):
+    """
+    Cached summary if there is one, else extractive or abstractive depending
+    on the latency budget (seconds) and current load. An abstractive run
+    that hits the budget deadline falls back to extractive.
+    Returns (summary, route, reason).
+    """
+    start = time.perf_counter()
+    max_words = length_params(length_setting)[2]
+
+    if not bypass_cache:
+        cached = summary_cache.get(cache_key(text, MODEL_NAME, mode=mode, max_words=max_words))
+        if cached is not None:
+            observe_summary(mode, True, start)
+            return cached, CACHED, None
+
+    route, reason = choose_route(text, mode, budget)
+    if route == ABSTRACTIVE:
+        try:
+            summary_text, _ = run_summarizer(
+                text, mode, bypass_cache=True, length_setting=length_setting, cancel=cancel
+            )
+            return summary_text, ABSTRACTIVE, None
+        except GenerationCancelled:
+            if budget is None or cancel is None or cancel.reason != "deadline exceeded":
+                raise
+            reason = "budget exceeded"
+
+    # Degraded answers are not cached: the next request may get the model
+    summary_text = extractive_summary(text, max_words)
+    observe_summary(EXTRACTIVE, False, start)
+    return summary_text, EXTRACTIVE, reason
+
+
+def observe_summary(mode, cached, start, count=1):
+    cached = "true" if cached else "false"
+    summary_seconds.observe(time.perf_counter() - start, mode=mode, cached=cached)
+    summaries_total.inc(count, mode=mode, cached=cached)
+
+
+def run_multi_length(text, mode, length_settings, bypass_cache=False, cancel=None):
+    """
+    One summary per length_setting; single-pass lengths share one encoder
+    pass. Returns [(length_setting, summary, cached)].
+    """
+    if mode == "full":
+        return [
+            (setting,) + run_summarizer(text, mode, bypass_cache, length_setting=setting, cancel=cancel)
+            for setting in length_settings
+        ]
+
+    start = time.perf_counter()
+    keys = {}
+    for setting in length_settings:
+        keys[setting] = cache_key(text, MODEL_NAME, mode=mode, max_words=length_params(setting)[2])
+
+    found = {} if bypass_cache else {
+        setting: summary_cache.get(key) for setting, key in keys.items()
+    }
+    missing = [setting for setting in length_settings if found.get(setting) is None]
+
+    computed = summarize_lengths(text, missing, cancel) if missing else {}
+    for setting, summary_text in computed.items():
+        summary_cache.put(keys[setting], MODEL_NAME, summary_text)
+    observe_summary("lengths", not missing, start, count=len(length_settings))
+
+    return [
+        (setting, computed[setting], False) if setting in computed else (setting, found[setting], True)
+        for setting in length_settings
+    ]
+
+
+def request_cancel_token(budget=None):
+    """
+    Cancel token carrying the per-request generation deadline: the latency
+    budget if the client set one, else SUMMARY_REQUEST_TIMEOUT.
+    """
+    timeouts = [t for t in (Config.SUMMARY_REQUEST_TIMEOUT, budget) if t]
+    return CancelToken(timeout=min(timeouts) if timeouts else None)
+
+
+def request_budget(options):
+    """Optional latency budget, sent as budget_ms; returned in seconds."""
+    budget_ms = options.get("budget_ms")
+    return float(budget_ms) / 1000 if budget_ms else None
+
+
+def request_word_count(value):
+    """value as a positive number of words; raises ValueError otherwise."""
+    try:
+        words = int(value)
+    except (TypeError, ValueError):
+        words = 0
+    if words <= 0:
+        raise ValueError(f"max_words must be a positive integer, got {value!r}")
+    return words
+
+
+def request_setting(value):
+    """A length preset, or "<n> words" for a positive word count given as n or "n words"."""
+    setting = str(value).strip()
+    if setting in LENGTH_PRESETS:
+        return setting
+    if setting.endswith("words"):
+        setting = setting[:-len("words")].strip()
+    try:
+        return f"{request_word_count(setting)} words"
+    except ValueError:
+        raise ValueError(
+            f"length must be one of {', '.join(LENGTH_PRESETS)} or a positive number of words, got {value!r}"
+        )
+
+
+def request_length_setting(options):
+    """An explicit max_words wins over the length_setting preset."""
+    if options.get("max_words") not in (None, ""):
+        return f"{request_word_count(options['max_words'])} words"
+    return request_setting(options.get("length_setting") or "medium")
+
+
+def request_lengths(options):
+    """
+    Optional list of lengths to generate at once, as a JSON list or a
+    comma-separated form field: presets or word counts.
+    """
+    lengths = options.get("lengths") or []
+    if isinstance(lengths, str):
+        lengths = [length for length in lengths.split(",") if length.strip()]
+
+    settings = []
+    for length in lengths:
+        setting = request_setting(length)
+        if setting not in settings:
+            settings.append(setting)
+    return settings
+
+
+def parse_summary_request(extract=True):
+    """
+    Read the summary source and options from a JSON body or a file upload.
+    With extract=False an uploaded PDF is returned unread as "pdf".
+    """
+    if 'pdf' in request.files or 'text_file' in request.files:
+        form = request.form
+        mode = form.get("mode", "fast")
+
+        pages = pdf = None
+        if 'pdf' in request.files and not extract:
+            text, pdf = None, request.files['pdf']
+        elif 'pdf' in request.files:
+            # A full-book summary reads every page, a single pass a sample
+            pages = {}
+            with spool_upload(request.files['pdf']) as path:
+                text = extract_text(path, None if mode == "full" else Config.SUMMARY_PDF_PAGES, pages)
+        else:
+            file = request.files['text_file']
+            text = file.read().decode('utf-8')
+
+        return {
+            "book_id": None,
+            "text": text,
+            "user_id": form.get("user_id"),
+            "length_setting": request_length_setting(form),
+            "lengths": request_lengths(form),
+            "budget": request_budget(form),
+            "mode": mode,
+            "bypass_cache": form.get("bypass_cache", "false").lower() == "true",
+            "pages": pages,
+            "pdf": pdf
+        }
+
+    data = request.json
+    return {
+        "book_id": data.get("book_id"),
+        "text": data.get("text"),
+        "user_id": data.get("user_id"),
+        "length_setting": request_length_setting(data),
+        "lengths": request_lengths(data),
+        "budget": request_budget(data),
+        "mode": data.get("mode", "fast"),
+        "bypass_cache": bool(data.get("bypass_cache", False)),
+        "pages": None,
+        "pdf": None
+    }
+
+
+def book_with_content(book_id):
+    """Book with its (deferred) content loaded in the same query."""
+    return Book.query.options(db.undefer(Book.content)).get_or_404(book_id)
+
+
+def save_book_summary(book, summary_text, length_setting, summary_type="auto"):
+    summary = Summary(
+        book_id=book.id,
+        summary_text=summary_text,
+        summary_type=summary_type,
+        length_setting=length_setting
+    )
+    db.session.add(summary)
+
+    log = Log(
+        user_id=book.user_id,
+        book_id=book.id,
+        action=f"Generated summary for: {book.title}"
+    )
+    db.session.add(log)
+    db.session.commit()
+    return summary
+
+
+def log_direct_summary(user_id):
+    if user_id:
+        log = Log(
+            user_id=user_id,
+            action="Generated summary from direct source"
+        )
+        db.session.add(log)
+        db.session.commit()
+
+
 @summary_bp.route("/generate", methods=["POST"])
 def generate_summary():
     try:
-        # Check if it's a file upload
-        if 'pdf' in request.files or 'text_file' in request.files:
-            if 'pdf' in request.files:
-                file = request.files['pdf']
-                from summarizer import extract_text_from_pdf
-                text = extract_text_from_pdf(file.read())
-            else:
-                file = request.files['text_file']
-                text = file.read().decode('utf-8')
+        try:
+            req = parse_summary_request()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
 
-            user_id = request.form.get("user_id")
-            length_setting = request.form.get("length_setting", "medium")
-        else:
-            data = request.json
-            book_id = data.get("book_id")
-            text = data.get("text")
-            length_setting = data.get("length_setting", "medium")
-            user_id = data.get("user_id")
-
-            # Case 1: Summary from existing book
-            if book_id:
-                book = Book.query.get_or_404(book_id)
-                summary_text = summarize_text(book.content)
-
-                # Create summary record
-                summary = Summary(
-                    book_id=book.id,
-                    summary_text=summary_text,
-                    summary_type="auto",
-                    length_setting=length_setting
-                )
-                db.session.add(summary)
-
-                # Log the action
-                log = Log(
-                    user_id=book.user_id,
-                    book_id=book.id,
-                    action=f"Generated summary for: {book.title}"
-                )
-                db.session.add(log)
-                db.session.commit()
-
-                return jsonify({
-                    "message": "Summary generated successfully",
-                    "book_id": book.id,
-                    "summary_id": summary.id,
-                    "summary": summary_text
-                })
+        book_id = req["book_id"]
+        text = req["text"]
+        user_id = req["user_id"]
+        length_setting = req["length_setting"]
+        mode = req["mode"]
+        bypass_cache = req["bypass_cache"]
+        budget = req["budget"]
+        cancel = request_cancel_token(budget)
+
+        # Several lengths in one request (e.g. short, medium and long)
+        if req["lengths"] and (book_id or text):
+            book = book_with_content(book_id) if book_id else None
+            results = run_multi_length(
+                book.content if book else text, mode, req["lengths"], bypass_cache, cancel
+            )
+
+            output = []
+            for setting, summary_text, cached in results:
+                item = {"length_setting": setting, "summary": summary_text, "cached": cached}
+                if book:
+                    item["summary_id"] = save_book_summary(book, summary_text, setting).id
+                output.append(item)
+
+            if not book:
+                log_direct_summary(user_id)
+
+            return jsonify({"book_id": book.id if book else None, "summaries": output})
+
+        # Case 1: Summary from existing book
+        if book_id:
+            book = book_with_content(book_id)
+            summary_text, route, reason = route_summarizer(
+                book.content, mode, bypass_cache, length_setting, budget, cancel
+            )
+            summary = save_book_summary(
+                book, summary_text, length_setting,
+                summary_type="extractive" if route == EXTRACTIVE else "auto"
+            )
+
+            return jsonify({
+                "message": "Summary generated successfully",
+                "book_id": book.id,
+                "summary_id": summary.id,
+                "summary": summary_text,
+                "cached": route == CACHED,
+                "mode": route,
+                "mode_reason": reason
+            })
 
         # Case 2: Summary from direct text or uploaded file
         if text:
-            summary_text = summarize_text(text)
+            summary_text, route, reason = route_summarizer(
+                text, mode, bypass_cache, length_setting, budget, cancel
+            )
+            log_direct_summary(user_id)
 
-            # Log if user_id provided
-            if user_id:
-                log = Log(
-                    user_id=user_id,
-                    action="Generated summary from direct source"
-                )
-                db.session.add(log)
-                db.session.commit()
+            body = {
+                "summary": summary_text,
+                "cached": route == CACHED,
+                "mode": route,
+                "mode_reason": reason
+            }
+            if req["pages"] is not None:
+                body.update(req["pages"])
+            return jsonify(body)
 
-            return jsonify({"summary": summary_text})
+        else:
+            return jsonify({"error": "book_id, text, or file required"}), 400
+
+    except GenerationCancelled as e:
+        db.session.rollback()
+        return jsonify({"error": f"Summary cancelled: {e}"}), 504
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+def sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+@summary_bp.route("/stream", methods=["POST"])
+def stream_summary_route():
+    """
+    Server-sent events: "token" events while the model generates, then one
+    "done" event with the full summary (or an "error" event).
+    """
+    try:
+        req = parse_summary_request()
+        book = book_with_content(req["book_id"]) if req["book_id"] else None
+        text = book.content if book else req["text"]
+
+        if not text:
+            return jsonify({"error": "book_id, text, or file required"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+    max_length, min_length, max_words = length_params(req["length_setting"])
+    key = cache_key(text, MODEL_NAME, mode="fast", max_words=max_words)
+    cancel = request_cancel_token(req["budget"])
+
+    def events():
+        start = time.perf_counter()
+        try:
+            cached = None if req["bypass_cache"] else summary_cache.get(key)
+            route, reason = (CACHED, None) if cached is not None else choose_route(text, "fast", req["budget"])
+
+            if cached is not None:
+                summary_text = cached
+                yield sse("token", {"text": cached})
+            elif route == EXTRACTIVE:
+                summary_text = extractive_summary(text, max_words)
+                yield sse("token", {"text": summary_text})
+            else:
+                pieces = []
+                for piece in stream_summary(text, max_length, min_length, max_words, cancel):
+                    pieces.append(piece)
+                    yield sse("token", {"text": piece})
+
+                summary_text = "".join(pieces).strip()
+                if not summary_text.endswith('.'):
+                    summary_text += '.'
+                summary_cache.put(key, MODEL_NAME, summary_text)
+            observe_summary(EXTRACTIVE if route == EXTRACTIVE else "stream", cached is not None, start)
+
+            done = {"summary": summary_text, "cached": cached is not None, "mode": route, "mode_reason": reason}
+            if book:
+                done["summary_id"] = save_book_summary(
+                    book, summary_text, req["length_setting"],
+                    summary_type="extractive" if route == EXTRACTIVE else "auto"
+                ).id
+            else:
+                log_direct_summary(req["user_id"])
+
+            yield sse("done", done)
+
+        except GeneratorExit:
+            # Client disconnected: stop generating for nobody
+            cancel.cancel("client disconnected")
+            raise
+
+        except Exception as e:
+            db.session.rollback()
+            yield sse("error", {"error": str(e)})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
+
+def job_to_dict(job):
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "progress": job.progress,
+        "book_id": job.book_id,
+        "summary_id": job.summary_id,
+        "summary": job.summary_text,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+
+# ================= ASYNC JOBS =================
+@summary_bp.route("/jobs", methods=["POST"])
+def create_summary_job():
+    """
+    Queue a summary and return its job id right away; poll GET /jobs/<id>.
+    An uploaded PDF is only saved here; the job extracts its pages.
+    """
+    source_path = None
+    try:
+        try:
+            req = parse_summary_request(extract=False)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        if req["book_id"]:
+            book = Book.query.get_or_404(req["book_id"])
+            user_id = book.user_id
+        elif req["text"] or req["pdf"]:
+            book = None
+            user_id = req["user_id"]
         else:
             return jsonify({"error": "book_id, text, or file required"}), 400
 
+        if req["pdf"] and not book:
+            source_path = keep_upload(req["pdf"], Config.JOB_UPLOAD_DIR)
+
+        job = SummaryJob(
+            user_id=user_id,
+            book_id=book.id if book else None,
+            source_text=None if book else req["text"],
+            source_path=source_path,
+            mode=req["mode"],
+            length_setting=req["length_setting"],
+            bypass_cache=req["bypass_cache"],
+            status="queued"
+        )
+        db.session.add(job)
+        db.session.commit()
+        job_runner.notify()
+
+        return jsonify({"job_id": job.id, "status": job.status}), 202
+
     except Exception as e:
         db.session.rollback()
+        if source_path:
+            os.remove(source_path)
+        return jsonify({"error": str(e)}), 500
+
+
+@summary_bp.route("/jobs/<int:job_id>", methods=["GET"])
+def get_summary_job(job_id):
+    try:
+        job = SummaryJob.query.get_or_404(job_id)
+        return jsonify(job_to_dict(job))
+
+    except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+
+@summary_bp.route("/jobs/<int:job_id>", methods=["DELETE"])
+def cancel_summary_job(job_id):
+    """
+    Cancel a queued or running job; a running one stops generating.
+    """
+    try:
+        job = SummaryJob.query.get_or_404(job_id)
+
+        if job.status not in ("queued", "running"):
+            return jsonify({"error": f"Job already {job.status}"}), 409
+
+        queued = job.status == "queued"
+        job.status = "cancelled"
+        job.error = "job cancelled"
+        job.finished_at = datetime.utcnow()
+        job.updated_at = job.finished_at
+        db.session.commit()
+        job_runner.cancel(job.id)
+        if queued:
+            remove_upload(job)  # a running job removes its own
+
+        return jsonify(job_to_dict(job))
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": str(e)}), 500
+
+
 @summary_bp.route("/book/<int:book_id>", methods=["GET"])
 def get_book_summaries(book_id):
     try:
@@ -97,3 +546,8 @@ def get_book_summaries(book_id):
 
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+
+@summary_bp.route("/cache/stats", methods=["GET"])
+def cache_stats():
+    return jsonify(summary_cache.info())
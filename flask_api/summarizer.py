@@ -1,143 +1,619 @@
-from transformers import T5Tokenizer, T5ForConditionalGeneration
-import torch
+import logging
 import re
+import threading
 import time
+from config import Config
+from metrics import stage_seconds, input_chars, input_tokens
+from batcher import InferenceBatcher
+from cancellation import CancelToken, GenerationCancelled
+from backends import load_backend
+from extractive import extract_key_sentences, sentence_spans, rank_sentences
+
+logger = logging.getLogger(__name__)
 
 MODEL_NAME = "t5-small"
+PREFIX = "summarize: "
+
+# Summary length presets, in target words (T5 writes ~1.4 tokens per word)
+LENGTH_PRESETS = {"short": 60, "medium": 120, "long": 250}
+TOKENS_PER_WORD = 1.4
+MAX_SUMMARY_WORDS = 400
+
+# ✅ Model is loaded lazily (torch/transformers are only imported on first use)
+_tokenizer = None
+_model = None
+_device = None
+_load_lock = threading.Lock()
+_word_starts = None
+
+model_status = {
+    "state": "not_loaded",      # not_loaded, loading, warming_up, ready, failed
+    "backend": Config.INFERENCE_BACKEND,
+    "device": None,
+    "load_seconds": None,
+    "warmup_seconds": None,
+    "error": None
+}
+
+
+def get_model():
+    """
+    Return (tokenizer, model, device), loading them once on first use.
+    """
+    global _tokenizer, _model, _device
+
+    if _model is not None:
+        return _tokenizer, _model, _device
+
+    with _load_lock:
+        if _model is None:
+            model_status["state"] = "loading"
+            start = time.time()
+            try:
+                tokenizer, model, device = load_backend(
+                    Config.INFERENCE_BACKEND,
+                    MODEL_NAME,
+                    onnx_cache_dir=Config.ONNX_CACHE_DIR
+                )
+                logger.info("Model loaded on %s (backend: %s)", device, Config.INFERENCE_BACKEND)
+            except Exception as e:
+                model_status["state"] = "failed"
+                model_status["error"] = str(e)
+                raise
+
+            _tokenizer, _device = tokenizer, device
+            _model = model
+            model_status["device"] = str(device)
+            model_status["load_seconds"] = round(time.time() - start, 3)
+            if model_status["state"] == "loading":
+                model_status["state"] = "warming_up"
+
+    return _tokenizer, _model, _device
+
+
+def get_tokenizer():
+    """
+    Tokenizer only; enough for chunking without loading the model (e.g.
+    when generation runs in model worker processes).
+    """
+    global _tokenizer
+
+    if _tokenizer is None:
+        with _load_lock:
+            if _tokenizer is None:
+                from transformers import T5TokenizerFast
+                _tokenizer = T5TokenizerFast.from_pretrained(MODEL_NAME)
+    return _tokenizer
+
+
+def warmup():
+    """
+    Load the model and run one dummy generate so the first request is warm.
+    Returns whether the model is ready.
+    """
+    try:
+        get_model()
+        start = time.time()
+        summarize_batch(["Warm up the summarization model."], max_length=8, min_length=1)
+        model_status["warmup_seconds"] = round(time.time() - start, 3)
+        model_status["state"] = "ready"
+        model_status["error"] = None
+        logger.info("Model warm in %.1fs", model_status["load_seconds"] + model_status["warmup_seconds"])
+        return True
+    except Exception as e:
+        model_status["state"] = "failed"
+        model_status["error"] = str(e)
+        logger.error("Model warmup failed: %s", e)
+        return False
+
+
+def warmup_until_ready():
+    """Retry warmup() with exponential backoff until the model is ready."""
+    delay = Config.MODEL_WARMUP_RETRY_SECONDS
+    while not warmup():
+        logger.info("Retrying model warmup in %ss", delay)
+        time.sleep(delay)
+        delay = min(delay * 2, Config.MODEL_WARMUP_RETRY_MAX_SECONDS)
+
+
+def start_warmup():
+    threading.Thread(target=warmup_until_ready, name="model-warmup", daemon=True).start()
+
+
+def is_ready():
+    return model_status["state"] == "ready"
+
+
+def length_params(length_setting="medium", max_words=None):
+    """
+    (max_length, min_length, max_words) for a preset ("short", "medium",
+    "long"), a "<n> words" setting or an explicit max_words.
+    """
+    if max_words is None and length_setting not in LENGTH_PRESETS:
+        try:
+            max_words = int(str(length_setting).split()[0])
+        except (ValueError, IndexError):
+            length_setting = "medium"
+
+    words = int(max_words) if max_words is not None else LENGTH_PRESETS[length_setting]
+    words = max(10, min(words, MAX_SUMMARY_WORDS))
+
+    max_length = int(words * TOKENS_PER_WORD) + 8
+    return max_length, max_length // 3, words
+
+
+def trim_words(text, max_words):
+    words = text.split()
+    if not max_words or len(words) <= max_words:
+        return text
+    return ' '.join(words[:max_words])
+
+
+def stopping_criteria(tokenizer, model, max_words=None, cancels=None):
+    """
+    StoppingCriteriaList for generate, or None when nothing can stop early.
+    Both criteria answer per row of the batch:
+
+    - max_words: a row ends once it has started word max_words + 1
+      (counted as SentencePiece pieces starting with "▁")
+    - cancels: one CancelToken (or None) per row; a row ends as soon as
+      its token fires, so cancelled work stops between decode steps
+    """
+    global _word_starts
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList
+
+    criteria = []
 
-# ✅ Device setup
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-print(f"🔧 Device: {device}")
-
-# ✅ Load model once at startup
-tokenizer = T5Tokenizer.from_pretrained(MODEL_NAME)
-model = T5ForConditionalGeneration.from_pretrained(MODEL_NAME).to(device)
-model.eval()
-
-if device.type == 'cuda':
-    model = model.half()
-
-
-def extract_key_sentences(text, num_sentences=12):
-    """
-    INSTANT extractive summarization - finds key sentences in < 1 second.
-    """
-    from collections import Counter
-    
-    sentences = re.split(r'(?<=[.!?])\s+', text)
-    sentences = [s.strip() for s in sentences if len(s.strip()) > 20]
-    
-    if len(sentences) <= num_sentences:
-        return ' '.join(sentences)
-    
-    # Word frequency scoring
-    all_words = []
-    sent_words = []
-    for s in sentences:
-        words = re.findall(r'\b[a-z]{3,}\b', s.lower())
-        sent_words.append(words)
-        all_words.extend(words)
-    
-    freq = Counter(all_words)
-    
-    # Score and rank
-    scores = []
-    for i, words in enumerate(sent_words):
-        score = sum(freq[w] for w in words) / (len(words) + 1) if words else 0
-        scores.append((score, i))
-    
-    # Get top sentences in original order
-    top_idx = sorted([i for _, i in sorted(scores, reverse=True)[:num_sentences]])
-    return ' '.join(sentences[i] for i in top_idx)
-
-
-def summarize_text(text, max_length=150, min_length=30):
+    if max_words:
+        if _word_starts is None:
+            vocab = max(len(tokenizer), model.config.vocab_size)
+            table = torch.zeros(vocab, dtype=torch.int32)
+            pieces = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+            table[[i for i, p in enumerate(pieces) if p and p.startswith("▁")]] = 1
+            _word_starts = table
+
+        class WordLimit(StoppingCriteria):
+            def __init__(self, word_starts):
+                self.word_starts = word_starts
+
+            def __call__(self, input_ids, scores, **kwargs):
+                if self.word_starts.device != input_ids.device:
+                    self.word_starts = self.word_starts.to(input_ids.device)
+                return self.word_starts[input_ids].sum(dim=-1) > max_words
+
+        criteria.append(WordLimit(_word_starts))
+
+    if cancels and any(c is not None for c in cancels):
+        class Cancelled(StoppingCriteria):
+            def __call__(self, input_ids, scores, **kwargs):
+                return torch.tensor(
+                    [c is not None and c.cancelled for c in cancels], device=input_ids.device
+                )
+
+        criteria.append(Cancelled())
+
+    return StoppingCriteriaList(criteria) if criteria else None
+
+
+def pack_input_ids(text, budget=None):
+    """
+    Input ids for one T5 pass: the highest ranked sentences that fit the
+    token budget, kept in original order, with the prefix and </s> added.
+    """
+    budget = budget or Config.SUMMARY_INPUT_TOKENS
+    tokenizer = get_tokenizer()
+
+    input_chars.observe(len(text))
+
+    # ✅ STEP 1: Clean (instant)
+    with stage_seconds.time(stage="clean"):
+        text = re.sub(r'\s+', ' ', text).strip()
+
+    prefix_ids = tokenizer(PREFIX.strip(), add_special_tokens=False)["input_ids"]
+    room = budget - len(prefix_ids) - 1  # 1 for </s>
+
+    # ✅ STEP 2: Rank sentences (< 1 sec for any size)
+    with stage_seconds.time(stage="extract"):
+        starts, ends = sentence_spans(text, min_chars=0)
+        if starts.size > 1:
+            order = rank_sentences(text, starts, ends, Config.EXTRACTIVE_METHOD).argsort(kind='stable')[::-1]
+            # Only tokenize enough top sentences to fill the window about twice (~4 chars/token)
+            lengths = (ends - starts)[order]
+            order = order[:max(1, int(((lengths + 1).cumsum() <= room * 8).sum()))]
+        else:
+            order = range(starts.size)
+
+    # ✅ STEP 3: Tokenize every candidate in one fast-tokenizer call
+    with stage_seconds.time(stage="tokenize"):
+        candidates = [text[starts[i]:ends[i]] for i in order]
+        ids = tokenizer(candidates, add_special_tokens=False)["input_ids"] if candidates else []
+
+    # ✅ STEP 4: Greedy packing in rank order; skip what does not fit
+    picked, used = [], 0
+    for i, sentence_ids in zip(order, ids):
+        if used + len(sentence_ids) <= room:
+            picked.append((i, sentence_ids))
+            used += len(sentence_ids)
+            if used == room:
+                break
+    if not picked and ids:
+        # The best sentence alone is longer than the window: keep its start
+        picked = [(order[0], ids[0][:room])]
+        used = room
+
+    picked.sort(key=lambda p: p[0])
+    input_tokens.observe(used + len(prefix_ids) + 1)
+    logger.debug("Packed %d/%d sentences into %d/%d tokens",
+                 len(picked), len(starts), used + len(prefix_ids) + 1, budget)
+
+    input_ids = list(prefix_ids)
+    for _, sentence_ids in picked:
+        input_ids.extend(sentence_ids)
+    input_ids.append(tokenizer.eos_token_id)
+    return input_ids
+
+
+def summarize_text(text, max_length=150, min_length=30, max_words=None, cancel=None):
     """
     GUARANTEED < 30 SECONDS summarization for ANY file size.
+    Decoding stops once the summary reaches max_words words; a fired cancel
+    token raises GenerationCancelled.
     """
     start_time = time.time()
-    
+
     if not text or len(text.strip()) == 0:
         return "No text provided."
 
-    original_size = len(text)
-    print(f"📄 Input: {original_size:,} chars ({original_size/1024:.1f} KB)")
-    
-    # ✅ STEP 1: Clean (instant)
-    text = re.sub(r'\s+', ' ', text).strip()
-    
-    # ✅ STEP 2: Extract key sentences FIRST (< 1 sec for any size)
-    # This is the key to handling large files fast
-    if len(text) > 5000:
-        print("⚡ Extracting key sentences...")
-        text = extract_key_sentences(text, num_sentences=15)
-        print(f"📝 Key content: {len(text):,} chars")
-    
-    # ✅ STEP 3: Hard limit for T5 model (keeps it fast)
-    MAX_CHARS = 4000  # ~1000 tokens = fast processing
-    if len(text) > MAX_CHARS:
-        text = text[:MAX_CHARS]
-    
-    # ✅ STEP 4: Single tokenization
-    tokens = tokenizer.encode(
-        "summarize: " + text,
-        max_length=512,
-        truncation=True,
-        return_tensors="pt"
-    ).to(device)
-    
-    print(f"🔢 Tokens: {tokens.shape[1]}")
-    
-    # ✅ STEP 5: Generate summary (single pass, no chunking for speed)
-    print("🚀 Generating summary...")
-    
-    with torch.no_grad():
-        output = model.generate(
-            tokens,
-            max_length=max_length,
-            min_length=min(min_length, 20),
-            num_beams=1,        # Greedy = fastest
-            do_sample=False,
-            early_stopping=True
-        )
-    
-    summary = tokenizer.decode(output[0], skip_special_tokens=True)
-    
+    input_ids = pack_input_ids(text)
+
+    # ✅ STEP 5: Generate (micro-batched with concurrent requests)
+    summary = batcher.submit(input_ids, max_length=max_length, min_length=min_length,
+                             max_words=max_words, cancel=cancel)
+
     # Clean up summary
     if not summary.endswith('.'):
         summary += '.'
-    
-    elapsed = time.time() - start_time
-    print(f"✅ Done in {elapsed:.1f}s | {len(summary.split())} words")
-    
+
+    logger.info("Summarized %d chars in %.2fs (%d words)",
+                len(text), time.time() - start_time, len(summary.split()))
+    return summary
+
+
+def extractive_summary(text, max_words=None):
+    """
+    Key sentences only, no model: the fallback when the abstractive path
+    would miss its latency budget.
+    """
+    if not text or len(text.strip()) == 0:
+        return "No text provided."
+
+    with stage_seconds.time(stage="extract"):
+        text = re.sub(r'\s+', ' ', text).strip()
+        num_sentences = max(3, (max_words or 120) // 15)
+        summary = trim_words(
+            extract_key_sentences(text, num_sentences=num_sentences, method=Config.EXTRACTIVE_METHOD),
+            max_words
+        )
+
+    if not summary.endswith('.'):
+        summary += '.'
     return summary
 
 
-def extract_text_from_pdf(pdf_file):
+def stream_summary(text, max_length=150, min_length=30, max_words=None, cancel=None):
     """
-    Fast PDF extraction with limits.
+    Yield the summary piece by piece while the model is still generating.
+    Runs outside the batcher: the first words arrive after the encoder pass
+    and one decoder step instead of after the full generation. With model
+    worker processes the pieces come back from a worker over its pipe.
     """
-    import PyPDF2
-    import io
-    
+    import worker_pool
+
+    if not text or len(text.strip()) == 0:
+        yield "No text provided."
+        return
+
+    input_ids = pack_input_ids(text)
+    cancel = cancel or CancelToken()
+
+    if worker_pool.model_pool is not None:
+        pieces = worker_pool.model_pool.run_stream(input_ids, max_length, min_length, max_words, cancel)
+    else:
+        pieces = stream_input_ids(input_ids, max_length, min_length, max_words, cancel)
+
+    finished = False
     try:
-        reader = PyPDF2.PdfReader(io.BytesIO(pdf_file))
-        
-        # Limit pages for speed
-        max_pages = 20
-        pages = min(len(reader.pages), max_pages)
-        print(f"📚 Reading {pages}/{len(reader.pages)} pages")
-        
-        text = []
-        for page in reader.pages[:pages]:
-            try:
-                t = page.extract_text()
-                if t:
-                    text.append(t)
-            except:
+        yield from pieces
+        finished = True
+    finally:
+        if not finished:
+            # The consumer went away (client disconnected): stop decoding
+            cancel.cancel("client disconnected")
+
+
+def stream_input_ids(input_ids, max_length=150, min_length=30, max_words=None, cancel=None):
+    """stream_summary on this process's model, for ids from pack_input_ids."""
+    # Load first: importing transformers while the warmup thread is mid-import races
+    tokenizer, model, device = get_model()
+
+    import torch
+    from transformers import TextIteratorStreamer
+
+    inputs = {k: v.to(device) for k, v in encode_batch(tokenizer, [input_ids]).items()}
+
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    cancel = cancel or CancelToken()
+    error = []
+
+    def run():
+        try:
+            with torch.no_grad(), stage_seconds.time(stage="generate"):
+                model.generate(
+                    **inputs,
+                    max_length=max_length,
+                    min_length=min(min_length, 20),
+                    num_beams=1,
+                    do_sample=False,
+                    streamer=streamer,
+                    stopping_criteria=stopping_criteria(tokenizer, model, max_words, [cancel])
+                )
+        except Exception as e:
+            error.append(e)
+            streamer.end()
+
+    thread = threading.Thread(target=run, name="summary-stream", daemon=True)
+    thread.start()
+
+    words = 0
+    finished = False
+    try:
+        for piece in streamer:
+            if not piece or (max_words and words >= max_words):
                 continue
-        
-        return "\n".join(text)
-    except Exception as e:
-        print(f"❌ PDF error: {e}")
-        return ""
+            if max_words:
+                # Generation stops on the first token past the limit; drop that word
+                count = len(piece.split())
+                if words + count > max_words:
+                    lead = piece[:len(piece) - len(piece.lstrip())]
+                    piece = lead + trim_words(piece.strip(), max_words - words)
+                words += count
+            yield piece
+        finished = True
+    finally:
+        if not finished:
+            # The consumer went away (client disconnected): stop decoding
+            cancel.cancel("client disconnected")
+
+    thread.join()
+    if error:
+        raise error[0]
+    if cancel.is_set():
+        raise GenerationCancelled(cancel.reason)
+
+
+def summarize_lengths(text, length_settings, cancel=None):
+    """
+    Several summary lengths of one text: extraction, tokenization and the
+    T5 encoder run once, then one decoder run per length_setting (queued
+    through the batcher as one request). Returns {length_setting: summary}.
+    """
+    if not text or len(text.strip()) == 0:
+        return {setting: "No text provided." for setting in length_settings}
+
+    outputs = batcher.submit_lengths(
+        pack_input_ids(text), [length_params(setting) for setting in length_settings], cancel=cancel
+    )
+
+    summaries = {}
+    for setting, summary in zip(length_settings, outputs):
+        if not summary.endswith('.'):
+            summary += '.'
+        summaries[setting] = summary
+    return summaries
+
+
+def generate_lengths(input_ids, lengths, cancel=None):
+    """
+    One summary per (max_length, min_length, max_words) in lengths for
+    ids from pack_input_ids: the encoder runs once, its output is reused
+    by one decoder run per length.
+    """
+    import torch
+
+    tokenizer, model, device = get_model()
+    inputs = {k: v.to(device) for k, v in encode_batch(tokenizer, [input_ids]).items()}
+
+    summaries = []
+    with torch.no_grad():
+        with stage_seconds.time(stage="encode"):
+            encoder_outputs = model.get_encoder()(**inputs, return_dict=True)
+
+        for max_length, min_length, max_words in lengths:
+            with stage_seconds.time(stage="generate"):
+                output = model.generate(
+                    encoder_outputs=encoder_outputs,
+                    attention_mask=inputs["attention_mask"],
+                    max_length=max_length,
+                    min_length=min(min_length, 20),
+                    num_beams=1,
+                    do_sample=False,
+                    stopping_criteria=stopping_criteria(tokenizer, model, max_words, [cancel])
+                )
+            if cancel is not None and cancel.is_set():
+                raise GenerationCancelled(cancel.reason)
+
+            with stage_seconds.time(stage="decode"):
+                summaries.append(trim_words(tokenizer.decode(output[0], skip_special_tokens=True).strip(), max_words))
+
+    return summaries
+
+
+def split_into_chunks(text, chunk_tokens=None):
+    """
+    Split text into sentence-aligned chunks of at most chunk_tokens tokens.
+    """
+    chunk_tokens = chunk_tokens or Config.SUMMARY_CHUNK_TOKENS
+
+    sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', text) if s.strip()]
+    if not sentences:
+        return []
+
+    tokenizer = get_tokenizer()
+
+    # One tokenizer call for every sentence instead of one per chunk
+    with stage_seconds.time(stage="tokenize"):
+        lengths = [len(ids) for ids in tokenizer(sentences, add_special_tokens=False)["input_ids"]]
+
+    chunks = []
+    current, current_len = [], 0
+    for sentence, n in zip(sentences, lengths):
+        if n > chunk_tokens:
+            # Oversized "sentence" (no punctuation): split it on words
+            words = sentence.split()
+            step = max(1, len(words) * chunk_tokens // n)
+            parts = [' '.join(words[i:i + step]) for i in range(0, len(words), step)]
+        else:
+            parts = [sentence]
+
+        for part in parts:
+            part_len = min(n, chunk_tokens)
+            if current and current_len + part_len > chunk_tokens:
+                chunks.append(' '.join(current))
+                current, current_len = [], 0
+            current.append(part)
+            current_len += part_len
+
+    if current:
+        chunks.append(' '.join(current))
+    return chunks
+
+
+def encode_batch(tokenizer, texts):
+    """
+    Right-pad a batch of inputs into (input_ids, attention_mask) tensors.
+    Each input is either a str or ready-made input ids from pack_input_ids.
+    """
+    import torch
+
+    # Truncate by hand: truncation=True switches the shared fast tokenizer's
+    # state, which fails ("Already borrowed") while another thread encodes
+    limit = Config.SUMMARY_INPUT_TOKENS
+    input_ids = []
+    for t in texts:
+        if isinstance(t, str):
+            t = tokenizer(PREFIX + t)["input_ids"]
+            if len(t) > limit:
+                t = t[:limit - 1] + [tokenizer.eos_token_id]
+        input_ids.append(t)
+
+    width = max(len(ids) for ids in input_ids)
+    ids = torch.full((len(input_ids), width), tokenizer.pad_token_id, dtype=torch.long)
+    mask = torch.zeros((len(input_ids), width), dtype=torch.long)
+    for row, seq in enumerate(input_ids):
+        ids[row, :len(seq)] = torch.tensor(seq, dtype=torch.long)
+        mask[row, :len(seq)] = 1
+    return {"input_ids": ids, "attention_mask": mask}
+
+
+def summarize_batch(texts, max_length=150, min_length=30, max_words=None, cancels=None):
+    """
+    Summarize several texts with a single padded model.generate call; with
+    max_words each row stops decoding once it reaches that many words, and
+    a row whose token in cancels fires stops right away.
+    """
+    import torch
+
+    tokenizer, model, device = get_model()
+    with stage_seconds.time(stage="tokenize"):
+        inputs = {k: v.to(device) for k, v in encode_batch(tokenizer, texts).items()}
+
+    with torch.no_grad(), stage_seconds.time(stage="generate"):
+        output = model.generate(
+            **inputs,
+            max_length=max_length,
+            min_length=min(min_length, 20),
+            num_beams=1,
+            do_sample=False,
+            stopping_criteria=stopping_criteria(tokenizer, model, max_words, cancels)
+        )
+
+    with stage_seconds.time(stage="decode"):
+        decoded = tokenizer.batch_decode(output, skip_special_tokens=True)
+    return [trim_words(s.strip(), max_words) for s in decoded]
+
+
+# ✅ All generate calls go through one scheduler thread
+batcher = InferenceBatcher(
+    summarize_batch,
+    max_batch_size=Config.INFERENCE_BATCH_SIZE,
+    max_wait_ms=Config.INFERENCE_BATCH_WAIT_MS,
+    run_lengths=generate_lengths
+)
+
+
+def summarize_book(text, max_length=150, min_length=30, max_words=None, batch_size=None,
+                   stage_budget=None, progress=None, cancel=None):
+    """
+    Full-book summarization: summarize every chunk (map), then summarize the
+    chunk summaries recursively (reduce) until they fit a single pass.
+
+    Each stage gets stage_budget seconds; chunks the model cannot reach in
+    time fall back to extractive key sentences so the whole book is covered.
+    progress, if given, is called with the fraction of work done (0..1).
+    A fired cancel token stops between (and within) batches.
+    """
+    start_time = time.time()
+
+    if not text or len(text.strip()) == 0:
+        return "No text provided."
+
+    batch_size = batch_size or Config.SUMMARY_BATCH_SIZE
+    stage_budget = stage_budget or Config.SUMMARY_STAGE_BUDGET
+
+    input_chars.observe(len(text))
+    with stage_seconds.time(stage="clean"):
+        text = re.sub(r'\s+', ' ', text).strip()
+    chunks = split_into_chunks(text)
+    logger.info("Full book: %d chars -> %d chunks", len(text), len(chunks))
+
+    stage = 0
+    while len(chunks) > 1 and stage < Config.SUMMARY_MAX_STAGES:
+        stage += 1
+        stage_start = time.time()
+        summaries = []
+
+        # The map stage is most of the work: it covers 0-80%, later stages the rest
+        stage_from, stage_to = (0.0, 0.8) if stage == 1 else (0.8, 0.95)
+
+        for i in range(0, len(chunks), batch_size):
+            if cancel is not None:
+                cancel.check()
+
+            batch = chunks[i:i + batch_size]
+            if time.time() - stage_start < stage_budget:
+                summaries.extend(batcher.submit_many(batch, max_length=80, min_length=20, cancel=cancel))
+            else:
+                with stage_seconds.time(stage="extract"):
+                    summaries.extend(extract_key_sentences(c, num_sentences=2, method=Config.EXTRACTIVE_METHOD) for c in batch)
+
+            if progress:
+                done = min(i + batch_size, len(chunks)) / len(chunks)
+                progress(stage_from + (stage_to - stage_from) * done)
+
+        logger.info("Stage %d: %d chunks in %.2fs", stage, len(chunks), time.time() - stage_start)
+        chunks = split_into_chunks(' '.join(summaries))
+
+    if len(chunks) > 1:
+        # Out of stages: fall back to the single-pass path on what is left
+        return summarize_text(' '.join(chunks), max_length=max_length, min_length=min_length,
+                              max_words=max_words, cancel=cancel)
+
+    summary = batcher.submit(
+        chunks[0], max_length=max_length, min_length=min_length, max_words=max_words, cancel=cancel
+    ) if chunks else ""
+    if not summary.endswith('.'):
+        summary += '.'
+
+    logger.info("Full book done in %.2fs (%d words)", time.time() - start_time, len(summary.split()))
+    return summary
@@ -0,0 +1,364 @@
+import logging
+import os
+import pickle
+import queue
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+from cancellation import CancelToken, GenerationCancelled
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------------------------------
+# Length-prefixed pickle frames over the worker's stdin/stdout
+# ---------------------------------------------------------------------------
+
+_HEADER = struct.Struct("!I")
+
+
+def _send(stream, obj):
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    stream.write(_HEADER.pack(len(data)) + data)
+    stream.flush()
+
+
+def _recv(stream):
+    header = stream.read(_HEADER.size)
+    if len(header) < _HEADER.size:
+        raise EOFError("worker pipe closed")
+    (size,) = _HEADER.unpack(header)
+    data = stream.read(size)
+    if len(data) < size:
+        raise EOFError("worker pipe closed mid-frame")
+    return pickle.loads(data)
+
+
+# ---------------------------------------------------------------------------
+# Parent side
+# ---------------------------------------------------------------------------
+
+class _Task:
+    """
+    One unit of work for a model process. kind is "batch" (summarize_batch),
+    "lengths" (generate_lengths) or "stream" (stream_input_ids, whose
+    pieces arrive on the pieces queue before done is set). cancels holds the CancelToken (or None) of each
+    row; a fired token is forwarded to the worker as a cancel frame.
+    """
+
+    def __init__(self, kind, args, cancels):
+        self.kind = kind
+        self.args = args
+        self.cancels = list(cancels)
+        self.pieces = queue.Queue() if kind == "stream" else None
+        self.streamed = False
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.attempts = 0
+
+    def frame(self):
+        # Cancel tokens can't cross the pipe: the worker rebuilds them from
+        # the remaining deadlines and gets explicit cancels as cancel frames
+        timeouts = [c.remaining() if c is not None else None for c in self.cancels]
+        return (self.kind, self.args, timeouts)
+
+    def cancelled(self):
+        return bool(self.cancels) and all(c is not None and c.cancelled for c in self.cancels)
+
+
+class ModelWorker:
+    """
+    One model process plus the parent thread that feeds it from the shared
+    task queue, restarting the process when it dies.
+    """
+
+    def __init__(self, pool, worker_id, threads):
+        self.pool = pool
+        self.worker_id = worker_id
+        self.threads = threads
+        self.proc = None
+        self.ready = False
+        self.busy = False
+        self.tasks_done = 0
+        self.restarts = 0
+        self.last_error = None
+
+    def _spawn(self):
+        self.ready = False
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), "--threads", str(self.threads)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        )
+        # First frame is sent once the model is loaded and warmed up
+        status = _recv(self.proc.stdout)
+        self.ready = True
+        logger.info("Model worker %d ready (pid %d, %d threads, warm in %ss)",
+                    self.worker_id, self.proc.pid, self.threads, status.get("load_seconds"))
+
+    def _restart(self, reason):
+        self.last_error = reason
+        self.ready = False
+        if self.proc is not None and self.proc.poll() is None:
+            try:
+                self.proc.kill()
+                self.proc.wait()
+            except OSError:
+                pass
+        self.restarts += 1
+        logger.warning("Model worker %d restarting: %s", self.worker_id, reason)
+        time.sleep(min(30, self.restarts))  # back off on crash loops
+
+    def serve(self):
+        while True:
+            try:
+                if self.proc is None or self.proc.poll() is not None:
+                    self._spawn()
+            except Exception as e:
+                self._restart(f"failed to start: {e}")
+                continue
+
+            # Health check while idle: notice a dead process before the next task
+            try:
+                task = self.pool.tasks.get(timeout=self.pool.health_interval)
+            except queue.Empty:
+                continue
+
+            if task.cancelled():
+                # Everyone waiting for it gave up while it was queued
+                task.error = GenerationCancelled(task.cancels[0].reason)
+                task.done.set()
+                continue
+
+            self.busy = True
+            task.attempts += 1
+            try:
+                status, payload = self._exchange(task)
+                if status == "ok":
+                    task.result = payload
+                elif status == "cancelled":
+                    task.error = GenerationCancelled(payload)
+                else:
+                    task.error = RuntimeError(payload)
+                self.tasks_done += 1
+                task.done.set()
+
+            except Exception as e:
+                # The process crashed mid-task (or sent something unreadable,
+                # so the pipe can't be trusted): retry it once on another
+                # worker, unless part of a stream already went out
+                if task.attempts < 2 and not task.streamed:
+                    self.pool.tasks.put(task)
+                else:
+                    task.error = RuntimeError(f"model worker crashed: {e}")
+                    task.done.set()
+                self._restart(f"crashed: {e}")
+
+            finally:
+                self.busy = False
+
+    def _exchange(self, task):
+        """Send task, relay stream pieces and cancels; (status, payload) of the reply."""
+        stop = threading.Event()
+        _send(self.proc.stdin, task.frame())
+        watcher = threading.Thread(
+            target=self._forward_cancels, args=(task, stop),
+            name=f"model-worker-{self.worker_id}-cancels", daemon=True
+        )
+        watcher.start()
+        try:
+            while True:
+                status, payload = _recv(self.proc.stdout)
+                if status != "piece":
+                    return status, payload
+                task.streamed = True
+                task.pieces.put(payload)
+        finally:
+            # Joined before the next task is sent: one writer on stdin at a time
+            stop.set()
+            watcher.join()
+
+    def _forward_cancels(self, task, stop):
+        sent = set()
+        while not stop.wait(0.05):
+            for row, cancel in enumerate(task.cancels):
+                if cancel is not None and row not in sent and cancel.is_set():
+                    sent.add(row)
+                    try:
+                        _send(self.proc.stdin, ("cancel", row, cancel.reason))
+                    except OSError:
+                        return  # the worker died; serve() restarts it
+
+    def info(self):
+        return {
+            "id": self.worker_id,
+            "pid": self.proc.pid if self.proc else None,
+            "alive": self.proc is not None and self.proc.poll() is None,
+            "ready": self.ready,
+            "busy": self.busy,
+            "threads": self.threads,
+            "tasks_done": self.tasks_done,
+            "restarts": self.restarts,
+            "last_error": self.last_error
+        }
+
+
+class ModelWorkerPool:
+    """
+    N model processes, each with its own model copy and a fixed share of
+    torch intra-op threads, fed from one task queue.
+    """
+
+    def __init__(self, processes, threads_per_process, health_interval=5):
+        self.tasks = queue.Queue()
+        self.health_interval = health_interval
+        self.workers = [ModelWorker(self, i, threads_per_process) for i in range(processes)]
+
+    def start(self):
+        for w in self.workers:
+            threading.Thread(target=w.serve, name=f"model-worker-{w.worker_id}", daemon=True).start()
+
+    def run_batch(self, texts, max_length=150, min_length=30, max_words=None, cancels=None):
+        """Same contract as summarizer.summarize_batch, run in a worker process."""
+        cancels = cancels or [None] * len(texts)
+        return self._run(_Task("batch", (texts, max_length, min_length, max_words), cancels))
+
+    def run_lengths(self, input_ids, lengths, cancel=None):
+        """Same contract as summarizer.generate_lengths, run in a worker process."""
+        return self._run(_Task("lengths", (input_ids, lengths), [cancel]))
+
+    def run_stream(self, input_ids, max_length=150, min_length=30, max_words=None, cancel=None):
+        """
+        Same contract as summarizer.stream_input_ids: pieces are yielded as
+        the worker sends them back. Cancelling stops the worker's decoding.
+        """
+        task = _Task("stream", (input_ids, max_length, min_length, max_words), [cancel])
+        self.tasks.put(task)
+        while True:
+            try:
+                yield task.pieces.get(timeout=0.05)
+            except queue.Empty:
+                if task.done.is_set() and task.pieces.empty():
+                    break
+        if task.error is not None:
+            raise task.error
+
+    def _run(self, task):
+        self.tasks.put(task)
+        task.done.wait()
+        if task.error is not None:
+            raise task.error
+        return task.result
+
+    def ready_count(self):
+        return sum(1 for w in self.workers if w.ready)
+
+    def info(self):
+        return {
+            "processes": len(self.workers),
+            "ready": self.ready_count(),
+            "queued_batches": self.tasks.qsize(),
+            "workers": [w.info() for w in self.workers]
+        }
+
+
+model_pool = None
+
+
+def init_model_pool():
+    """
+    Start MODEL_WORKER_PROCESSES model processes and route the batcher to
+    them. Returns the pool, or None when inference stays in-process.
+    """
+    global model_pool
+
+    processes = Config.MODEL_WORKER_PROCESSES
+    if processes <= 0:
+        return None
+
+    from summarizer import batcher
+
+    threads = Config.MODEL_WORKER_THREADS or max(1, (os.cpu_count() or 1) // processes)
+    model_pool = ModelWorkerPool(processes, threads)
+    model_pool.start()
+    batcher.configure(model_pool.run_batch, max_in_flight=processes, run_lengths=model_pool.run_lengths)
+    return model_pool
+
+
+# ---------------------------------------------------------------------------
+# Child side: python worker_pool.py --threads N
+# ---------------------------------------------------------------------------
+
+def worker_main(threads):
+    # Frames go over the real stdout; everything printed goes to stderr
+    proto_out = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+    sys.stdout = sys.stderr
+    proto_in = sys.stdin.buffer
+
+    import logging
+    logging.basicConfig(level=Config.LOG_LEVEL, format="%(asctime)s %(levelname)s worker: %(message)s")
+
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    import summarizer
+    summarizer.warmup()
+    if not summarizer.is_ready():
+        sys.exit(1)
+    _send(proto_out, dict(summarizer.model_status))
+
+    # Frames are read on a thread so cancel frames land while the main
+    # thread generates. The tokens of a task are made as its frame is read:
+    # the parent sends no cancel for a task before the task itself
+    tasks = queue.Queue()
+    current = []
+
+    def read_frames():
+        while True:
+            try:
+                frame = _recv(proto_in)
+            except EOFError:
+                tasks.put(None)  # parent went away
+                return
+            if frame[0] == "cancel":
+                _, row, reason = frame
+                if row < len(current):
+                    current[row].cancel(reason)
+                continue
+            kind, args, timeouts = frame
+            current[:] = [CancelToken(timeout=t) for t in timeouts]
+            tasks.put((kind, args, list(current)))
+
+    threading.Thread(target=read_frames, name="worker-frames", daemon=True).start()
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        kind, args, cancels = task
+
+        try:
+            if kind == "stream":
+                for piece in summarizer.stream_input_ids(*args, cancel=cancels[0]):
+                    _send(proto_out, ("piece", piece))
+                result = None
+            elif kind == "lengths":
+                result = summarizer.generate_lengths(*args, cancel=cancels[0])
+            else:
+                result = summarizer.summarize_batch(*args, cancels=cancels)
+            _send(proto_out, ("ok", result))
+        except GenerationCancelled as e:
+            _send(proto_out, ("cancelled", str(e)))
+        except Exception as e:
+            _send(proto_out, ("error", str(e)))
+
+
+if __name__ == "__main__":
+    worker_main(int(sys.argv[sys.argv.index("--threads") + 1]))
@@ -33,10 +33,11 @@ with tab1:
             admin_count = len([u for u in users if u['role'] == 'admin'])
             user_count = total_users - admin_count
 
-            col1, col2, col3 = st.columns(3)
+            col1, col2, col3, col4 = st.columns(4)
             col1.metric("Total Users", total_users)
             col2.metric("Regular Users", user_count)
             col3.metric("Admins", admin_count)
+            col4.metric("Summaries", sum(u.get('summary_count', 0) for u in users))
 
             st.divider()
 
@@ -66,6 +67,7 @@ with tab1:
                         <div style="text-align: right; font-size: 0.9rem;">
                             <div style="color: var(--text-muted); margin-bottom:0.25rem;">Joined: {join_date}</div>
                             <div class="badge badge-green"><b>{user['book_count']}</b> Books</div>
+                            <div class="badge badge-blue"><b>{user.get('summary_count', 0)}</b> Summaries</div>
                         </div>
                     </div>
                     """, unsafe_allow_html=True)
@@ -90,22 +92,26 @@ with tab2:
     st.markdown("### 📚 System-Wide Book Management")
     
     try:
-        from utils import API_BASE
-        
-        # Fetch all books
+        from utils import loaded_pages, load_next_page, get_totals
+
+        # Fetch books page by page ("Load more" adds a page)
         with st.spinner("Loading all books..."):
-            response = requests.get(f"{API_BASE}/books/all")
+            try:
+                all_books, more_books = loaded_pages("admin_books", "/books/all")
+                book_totals = get_totals("/books/all")
+                fetched = True
+            except requests.RequestException:
+                fetched = False
         
-        if response.status_code == 200:
-            all_books = response.json()
+        if fetched:
             
             if not all_books:
                 st.info("📭 No books in the system yet.")
             else:
-                # Statistics Dashboard
-                total_books = len(all_books)
-                summarized_books = sum(1 for b in all_books if b.get("has_summary"))
-                unique_users = len(set(b.get("user_id") for b in all_books if b.get("user_id")))
+                # Statistics Dashboard (whole system, not just the loaded pages)
+                total_books = book_totals["book_count"]
+                summarized_books = book_totals["summarized_count"]
+                unique_users = book_totals["user_count"]
                 
                 col1, col2, col3, col4 = st.columns(4)
                 with col1:
@@ -150,7 +156,7 @@ with tab2:
                 if filter_type != "All":
                     filtered_books = [b for b in filtered_books if b.get("file_type", "").upper() == filter_type]
                 
-                st.markdown(f"**Showing {len(filtered_books)} of {total_books} books**")
+                st.markdown(f"**Showing {len(filtered_books)} of {len(all_books)} loaded books**")
                 st.write("")
                 
                 # Display books
@@ -164,7 +170,8 @@ with tab2:
                     # Status badge
                     status_badge = ""
                     if book.get("has_summary"):
-                        status_badge = '<span class="badge badge-green">✓ Summarized</span>'
+                        count = book.get("summary_count", 1)
+                        status_badge = f'<span class="badge badge-green">✓ {count} Summar{"y" if count == 1 else "ies"}</span>'
                     else:
                         status_badge = '<span class="badge" style="background: var(--warning); color: white;">⏳ Pending</span>'
                     
@@ -211,6 +218,10 @@ with tab2:
                             st.rerun()
                     
                     st.write("")
+
+                if more_books and st.button("⬇️ Load more books", use_container_width=True):
+                    load_next_page("admin_books")
+                    st.rerun()
         
         else:
             st.error("Failed to fetch books from the system")
@@ -284,26 +295,30 @@ with tab3:
     else:
         # Show all system logs
         try:
-            from utils import API_BASE
-            
-            # Fetch all logs
+            from utils import loaded_pages, load_next_page, get_totals
+
+            # Fetch logs page by page, newest first ("Load more" adds a page)
             with st.spinner("Loading system logs..."):
-                response = requests.get(f"{API_BASE}/auth/logs/all")
+                try:
+                    all_logs, more_logs = loaded_pages("admin_logs", "/auth/logs/all", limit=100)
+                    log_totals = get_totals("/auth/logs/all")
+                    fetched = True
+                except requests.RequestException:
+                    fetched = False
             
-            if response.status_code == 200:
-                all_logs = response.json()
+            if fetched:
                 
                 if not all_logs:
                     st.info("📭 No system logs available yet.")
                 else:
-                    # Statistics
-                    total_logs = len(all_logs)
-                    unique_users_in_logs = len(set(log.get("user_id") for log in all_logs if log.get("user_id")))
+                    # Statistics (whole system, counted by the API)
+                    total_logs = log_totals["log_count"]
+                    unique_users_in_logs = log_totals["user_count"]
                     
                     # Count action types
-                    login_count = sum(1 for log in all_logs if "login" in log.get("action", "").lower())
-                    upload_count = sum(1 for log in all_logs if "upload" in log.get("action", "").lower())
-                    summary_count = sum(1 for log in all_logs if "summary" in log.get("action", "").lower())
+                    login_count = log_totals["login_count"]
+                    upload_count = log_totals["upload_count"]
+                    summary_count = log_totals["summary_count"]
                     
                     col1, col2, col3, col4 = st.columns(4)
                     with col1:
@@ -337,11 +352,11 @@ with tab3:
                         filtered_logs = [log for log in filtered_logs 
                                        if filter_action.lower() in log.get("action", "").lower()]
                     
-                    st.markdown(f"**Showing {len(filtered_logs)} of {total_logs} logs**")
+                    st.markdown(f"**Showing {len(filtered_logs)} of {len(all_logs)} loaded logs**")
                     st.write("")
                     
                     # Display logs
-                    for log in filtered_logs[:100]:  # Limit to 100 most recent
+                    for log in filtered_logs:
                         time_str = "-"
                         if log.get("created_at"):
                             time_str = datetime.fromisoformat(
@@ -389,8 +404,9 @@ with tab3:
                         </div>
                         """, unsafe_allow_html=True)
                     
-                    if len(filtered_logs) > 100:
-                        st.info(f"ℹ️ Showing first 100 of {len(filtered_logs)} logs. Use filters to narrow down results.")
+                    if more_logs and st.button("⬇️ Load more logs", use_container_width=True):
+                        load_next_page("admin_logs")
+                        st.rerun()
             
             else:
                 st.error("Failed to fetch system logs")
@@ -405,6 +421,8 @@ nav1, nav2 = st.columns(2)
 
 with nav1:
     if st.button("🏠 Dashboard", use_container_width=True):
+        from utils import reset_pages
+        reset_pages()
         st.session_state.page = "Dashboard"
         st.rerun()
 
@@ -3,7 +3,7 @@ import requests
 import pandas as pd
 import os
 from utils_ui import card, section_header, load_css
-from utils import list_books, API_BASE
+from utils import get_book_stats, loaded_pages, load_next_page, reset_pages, API_BASE
 
 # ✅ PREVENT DUPLICATE AVATAR BUTTON
 # if "profile_rendered" not in st.session_state:
@@ -130,6 +130,7 @@ for col, (option, icon) in zip(nav_cols, nav_options.items()):
             type=btn_type
         ):
             st.session_state.nav = option
+            reset_pages()  # lists start again from their newest rows
             st.rerun()
 
 # ───────────────── ROUTING VIEW ─────────────────
@@ -138,9 +139,11 @@ if st.session_state.nav == "Overview":
     col1, col2, col3 = st.columns(3)
 
     try:
-        res = list_books(st.session_state.user_id)
-        books = res.json() if res.status_code == 200 else []
-        total_books = len(books)
+        # Library totals, computed by the API
+        stats_res = get_book_stats(st.session_state.user_id)
+        stats_res.raise_for_status()
+        stats = stats_res.json()
+        total_books = stats["book_count"]
 
         logs_res = requests.get(
             f"{API_BASE}/auth/logs/{st.session_state.user_id}"
@@ -155,8 +158,8 @@ if st.session_state.nav == "Overview":
 
         # Calculate Reading Time Saved
         # Avg reading speed = 250 wpm
-        total_book_words = sum(b.get("word_count", 0) for b in books)
-        total_summary_words = sum(b.get("summary_word_count", 0) for b in books)
+        total_book_words = stats["word_count"]
+        total_summary_words = stats["summary_word_count"]
         
         # Time in minutes
         time_saved_minutes = (total_book_words - total_summary_words) / 250
@@ -309,11 +312,17 @@ elif st.session_state.nav == "My Books":
     exec(open(os.path.join(os.path.dirname(__file__), "View_Books.py"), encoding="utf-8").read())
 
 elif st.session_state.nav == "History":
-    res = requests.get(f"{API_BASE}/auth/logs/{st.session_state.user_id}")
-    if res.status_code == 200:
-        df = pd.DataFrame(res.json())
+    try:
+        history, more_history = loaded_pages("history", f"/auth/history/{st.session_state.user_id}")
+        df = pd.DataFrame(history)
         st.dataframe(df, use_container_width=True)
 
+        if more_history and st.button("⬇️ Load more", use_container_width=True):
+            load_next_page("history")
+            st.rerun()
+    except requests.RequestException:
+        st.error("Failed to load history")
+
 elif st.session_state.nav == "Profile":
     exec(open(os.path.join(os.path.dirname(__file__), "Profile.py"), encoding="utf-8").read())
 
@@ -1,6 +1,6 @@
 import streamlit as st
 import requests
-from utils import API_BASE
+from utils import API_BASE, get_book_stats
 
 # Reset padding
 st.markdown(
@@ -221,10 +221,11 @@ with tab2:
     # Fetch user statistics
     # Fetch user statistics
     try:
-        # Get books count (Fixed Endpoint)
-        books_res = requests.get(f"{API_BASE}/books/list/{st.session_state.user_id}")
-        books = books_res.json() if books_res.status_code == 200 else []
-        total_books = len(books)
+        # Library totals, computed by the API
+        stats_res = get_book_stats(st.session_state.user_id)
+        stats_res.raise_for_status()
+        stats = stats_res.json()
+        total_books = stats["book_count"]
         
         # Get logs
         logs_res = requests.get(f"{API_BASE}/auth/logs/{st.session_state.user_id}")
@@ -238,8 +239,8 @@ with tab2:
         
         # Calculate Reading Time Saved (Real Calculation)
         # Avg reading speed = 250 wpm
-        total_book_words = sum(b.get("word_count", 0) for b in books)
-        total_summary_words = sum(b.get("summary_word_count", 0) for b in books)
+        total_book_words = stats["word_count"]
+        total_summary_words = stats["summary_word_count"]
         
         # Time in minutes
         time_saved_minutes = (total_book_words - total_summary_words) / 250
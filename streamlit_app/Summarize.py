@@ -1,8 +1,9 @@
 import streamlit as st
 import streamlit.components.v1 as components
-from utils import generate_summary, generate_summary_from_file, generate_audio, API_BASE
+from utils import stream_summary, submit_summary_job, get_summary_job, generate_audio, API_BASE, JOB_QUEUE_TIMEOUT, JOB_WAIT_TIMEOUT
 import requests
 import base64
+import time
 
 # =========================================================
 # SESSION STATE
@@ -101,41 +102,93 @@ if not summary_ready:
         # ===============================
         # GENERATE ACTION
         # ===============================
-        if generate_clicked:
-            with st.spinner("Generating summary..."):
-                try:
-                    word_limit = int(summary_length.split()[0])
-                    res = None
-
-                    if source == "Paste Text" and input_text.strip():
-                        res = generate_summary({
-                            "text": input_text,
-                            "user_id": st.session_state.get("user_id"),
-                            "format": output_format,
-                            "max_words": word_limit
-                        })
-
-                    elif source == "Upload File (PDF/TXT)" and uploaded_file:
-                        files = (
-                            {"pdf": uploaded_file.getvalue()}
-                            if uploaded_file.name.endswith(".pdf")
-                            else {"text_file": uploaded_file.getvalue()}
-                        )
-                        res = generate_summary_from_file(files)
+        word_limit = int(summary_length.split()[0])
+
+        if generate_clicked and source == "Paste Text" and input_text.strip():
+            # Stream the summary in as the model writes it
+            try:
+                result = {}
+
+                def summary_tokens():
+                    for event, data in stream_summary({
+                        "text": input_text,
+                        "user_id": st.session_state.get("user_id"),
+                        "format": output_format,
+                        "max_words": word_limit
+                    }):
+                        if event == "token":
+                            yield data["text"]
+                        else:
+                            result[event] = data
+
+                st.markdown("### 📘 Generating Summary...")
+                st.write_stream(summary_tokens())
+
+                if "done" in result:
+                    st.session_state.current_summary = result["done"]["summary"]
+                    st.rerun()
+                else:
+                    st.error(result.get("error", {}).get("error", "Summary generation failed"))
+
+            except Exception as e:
+                st.error(f"Connection error: {str(e)}")
+
+        elif generate_clicked:
+            # Files can be whole books: run as a background job and poll
+            try:
+                if not (source == "Upload File (PDF/TXT)" and uploaded_file):
+                    st.error("Please provide text or upload a file.")
+                    st.stop()
+
+                files = (
+                    {"pdf": uploaded_file.getvalue()}
+                    if uploaded_file.name.endswith(".pdf")
+                    else {"text_file": uploaded_file.getvalue()}
+                )
+                res = submit_summary_job(files=files, payload={
+                    "user_id": st.session_state.get("user_id"),
+                    "max_words": word_limit,
+                    "mode": "full"
+                })
+
+                if res.status_code != 202:
+                    st.error(res.text)
+                    st.stop()
 
-                    else:
-                        st.error("Please provide text or upload a file.")
-                        st.stop()
+                job_id = res.json()["job_id"]
+                progress_bar = st.progress(0, text="Queued...")
+                started = time.time()
 
-                    if res and res.status_code == 200:
-                        st.session_state.current_summary = res.json().get("summary", "")
+                while True:
+                    job = get_summary_job(job_id).json()
+
+                    if job.get("status") == "done":
+                        progress_bar.progress(100, text="Done")
+                        st.session_state.current_summary = job.get("summary", "")
                         st.rerun()
 
-                    elif res:
-                        st.error(res.text)
+                    if job.get("status") == "failed" or job.get("error"):
+                        st.error(job.get("error", "Summary generation failed"))
+                        break
+
+                    # Don't poll forever when no worker runs the job or it hangs
+                    waited = time.time() - started
+                    limit = JOB_QUEUE_TIMEOUT if job.get("status") == "queued" else JOB_WAIT_TIMEOUT
+                    if waited > limit:
+                        st.error(
+                            f"Summary job {job_id} is still {job.get('status', 'queued')} "
+                            f"after {int(waited // 60)} minutes. Please try again later."
+                        )
+                        break
+
+                    progress_bar.progress(
+                        job.get("progress", 0),
+                        text="Generating summary..." if job.get("status") == "running" else "Queued..."
+                    )
+                    time.sleep(1)
 
-                except Exception as e:
-                    st.error(f"Connection error: {str(e)}")
+            except Exception as e:
+                st.error(f"Connection error: {str(e)}")
 
 
 # =========================================================
@@ -24,7 +24,7 @@ with st.expander("🔍 Search & Filter", expanded=True):
 
 # ───────────────── FETCH BOOKS ─────────────────
 try:
-    from utils import get_book_details, delete_book, API_BASE
+    from utils import get_book_details, delete_book, loaded_pages, load_next_page, reset_pages
 
     params = {}
     if search_title:
@@ -34,23 +34,20 @@ try:
     if search_tag:
         params["tag"] = search_tag
 
-    # Use spinner for better UX
+    # Pages loaded so far; back to the first page when the filters change
     with st.spinner("Loading library..."):
-        response = requests.get(
-            f"{API_BASE}/books/list/{st.session_state.user_id}",
-            params=params
-        )
-
-    if response.status_code != 200:
-        st.error("Failed to fetch books")
-        st.stop()
-
-    books = response.json()
+        try:
+            books, more_books = loaded_pages(
+                "books", f"/books/list/{st.session_state.user_id}", params
+            )
+        except requests.RequestException:
+            st.error("Failed to fetch books")
+            st.stop()
 
     if not books:
         st.info("📭 No books found in your library.")
     else:
-        st.markdown(f"**Found {len(books)} book(s)**")
+        st.markdown(f"**Showing {len(books)}{'+' if more_books else ''} book(s)**")
         st.write("")
 
         for book in books:
@@ -113,6 +110,10 @@ try:
                 # Close container visually
                 st.write("") 
 
+        if more_books and st.button("⬇️ Load more", use_container_width=True):
+            load_next_page("books")
+            st.rerun()
+
 except Exception as e:
     st.error(f"Error loading books: {e}")
     st.stop()
@@ -190,6 +191,7 @@ if st.session_state.get("show_book_detail") and st.session_state.get("selected_b
                         st.session_state.pop("confirm_delete")
                         st.session_state.pop("show_book_detail")
                         st.session_state.pop("selected_book_id")
+                        reset_pages()
                         st.rerun()
                     else:
                         st.error("Delete failed")
@@ -1,10 +1,17 @@
 import requests
+import json
+import streamlit as st
 
 API_BASE = "http://127.0.0.1:5000/api"
 
 # ✅ Timeout settings (in seconds)
 DEFAULT_TIMEOUT = 30
 SUMMARY_TIMEOUT = 180  # 3 minutes for summarization
+JOB_QUEUE_TIMEOUT = 5 * 60  # a job no worker has picked up by then is given up on
+JOB_WAIT_TIMEOUT = 60 * 60  # stop polling a summary job after 1 hour
+
+# Rows per request on the paginated list endpoints
+PAGE_SIZE = 50
 
 def login_user(email, password):
     return requests.post(
@@ -20,8 +27,54 @@ def register_user(payload):
         timeout=DEFAULT_TIMEOUT
     )
 
-def list_books(user_id):
-    return requests.get(f"{API_BASE}/books/list/{user_id}", timeout=DEFAULT_TIMEOUT)
+def fetch_page(path, params=None, cursor=None, limit=PAGE_SIZE):
+    """
+    One page of a paginated list endpoint: (items, next_cursor).
+    next_cursor is None on the last page.
+    """
+    params = dict(params or {}, limit=limit)
+    if cursor:
+        params["cursor"] = cursor
+    res = requests.get(f"{API_BASE}{path}", params=params, timeout=DEFAULT_TIMEOUT)
+    res.raise_for_status()
+    body = res.json()
+    return body["items"], body["next_cursor"]
+
+def loaded_pages(name, path, params=None, limit=PAGE_SIZE):
+    """
+    Rows of a "Load more" list loaded so far and whether more follow. The
+    rows and the next page's cursor are kept in session_state, so reruns
+    fetch nothing; the first page is fetched when the list is new or its
+    path or params changed.
+    """
+    lists = st.session_state.setdefault("paged_lists", {})
+    state = lists.get(name)
+    if state is None or (state["path"], state["params"]) != (path, params):
+        items, cursor = fetch_page(path, params, None, limit)
+        state = lists[name] = {
+            "path": path, "params": params, "limit": limit, "items": items, "cursor": cursor
+        }
+    return state["items"], state["cursor"] is not None
+
+def load_next_page(name):
+    """Append the next page to a list shown with loaded_pages()."""
+    state = st.session_state["paged_lists"][name]
+    items, cursor = fetch_page(state["path"], state["params"], state["cursor"], state["limit"])
+    state["items"] = state["items"] + items
+    state["cursor"] = cursor
+
+def reset_pages():
+    """Drop the loaded lists so they are fetched afresh."""
+    st.session_state.pop("paged_lists", None)
+
+def get_book_stats(user_id):
+    return requests.get(f"{API_BASE}/books/stats/{user_id}", timeout=DEFAULT_TIMEOUT)
+
+def get_totals(path):
+    """Totals of an admin list endpoint (path + "/stats"), raising on errors."""
+    res = requests.get(f"{API_BASE}{path}/stats", timeout=DEFAULT_TIMEOUT)
+    res.raise_for_status()
+    return res.json()
 
 def get_book_details(book_id):
     return requests.get(f"{API_BASE}/books/detail/{book_id}", timeout=DEFAULT_TIMEOUT)
@@ -47,6 +100,37 @@ def generate_summary_from_file(files):
         timeout=SUMMARY_TIMEOUT  # 3 minutes
     )
 
+# ✅ Server-sent events: yields (event, data) as the summary is generated
+def stream_summary(payload):
+    with requests.post(
+        f"{API_BASE}/summary/stream",
+        json=payload,
+        stream=True,
+        timeout=(DEFAULT_TIMEOUT, SUMMARY_TIMEOUT)  # read timeout is per chunk
+    ) as res:
+        if res.status_code != 200:
+            yield "error", {"error": res.text}
+            return
+
+        event, data = "message", []
+        for line in res.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data.append(line[len("data:"):].strip())
+            elif not line and data:
+                yield event, json.loads("\n".join(data))
+                event, data = "message", []
+
+# ✅ Async jobs: submit returns a job id at once, then poll for progress
+def submit_summary_job(files=None, payload=None):
+    if files:
+        return requests.post(f"{API_BASE}/summary/jobs", files=files, data=payload, timeout=60)
+    return requests.post(f"{API_BASE}/summary/jobs", json=payload, timeout=DEFAULT_TIMEOUT)
+
+def get_summary_job(job_id):
+    return requests.get(f"{API_BASE}/summary/jobs/{job_id}", timeout=DEFAULT_TIMEOUT)
+
 def delete_book(book_id):
     return requests.delete(f"{API_BASE}/books/delete/{book_id}", timeout=DEFAULT_TIMEOUT)
 
@@ -57,7 +141,6 @@ def get_all_books():
     return requests.get(f"{API_BASE}/admin/books", timeout=DEFAULT_TIMEOUT)
 from gtts import gTTS
 import tempfile
-import streamlit as st
 
 
 @st.cache_data(show_spinner=False)